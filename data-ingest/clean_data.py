@@ -74,3 +74,44 @@ def prepare_article_for_embeddings(article: Dict[str, Any], chunk_size: int = DE
             }
         )
     return docs
+
+
+def prepare_articles_for_embeddings(articles: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP) -> List[Dict[str, Any]]:
+    """
+    Chunk a batch of articles; same output as prepare_article_for_embeddings on each in turn.
+    HTML cleaning and date parsing run once per distinct string, and chunk start offsets
+    come from range() arithmetic instead of a per-chunk loop.
+    """
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError("overlap must be smaller than chunk_size")
+    cleaned: Dict[str, str] = {}
+    dates: Dict[Optional[str], Optional[str]] = {}
+    docs: List[Dict[str, Any]] = []
+    for article in articles:
+        content = article.get("content") or article.get("summary") or article.get("title") or ""
+        text = cleaned.get(content)
+        if text is None:
+            text = cleaned[content] = normalize_text(clean_html_text(content))
+        if not text:
+            continue
+        published = article.get("published")
+        if published not in dates:
+            dates[published] = parse_date_safe(published)
+        article_id = article.get("id")
+        meta = {
+            "source": article.get("source"),
+            "title": article.get("title"),
+            "link": article.get("link"),
+            "published": dates[published],
+        }
+        # Chunk k starts at k * step; the last one is the first that reaches the end of the text
+        for i, start in enumerate(range(0, max(len(text) - chunk_size, 0) + step, step)):
+            docs.append(
+                {
+                    "id": f"{article_id}_chunk_{i}",
+                    "text": text[start:start + chunk_size],
+                    "meta": {**meta, "chunk_index": i},
+                }
+            )
+    return docs
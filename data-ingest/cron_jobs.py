@@ -4,7 +4,9 @@ Enhanced cron jobs with vector service integration
 Legacy scheduler functions - use scheduler_service.py for new implementations
 """
 import time
+import threading
 import schedule
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 from pathlib import Path
@@ -177,6 +179,7 @@ def run_periodic_ingestion(rss_feeds, interval_minutes: int = 30, demo: bool = T
 
     def job():
         LOG.info("Running scheduled ingestion job")
+        _time = time.time
         try:
             from .fetch_portfolio import fetch_portfolio_from_api, ingest_portfolio_and_save
             from api.utils.config import get_portfolio_api_config # Assuming this config exists or will be created
@@ -188,19 +191,36 @@ def run_periodic_ingestion(rss_feeds, interval_minutes: int = 30, demo: bool = T
             if portfolio_api_url:
                 LOG.info("Fetching portfolio from actual API")
                 p = fetch_portfolio_from_api(api_url=portfolio_api_url, api_key=portfolio_api_key)
-                ingest_portfolio_and_save(p, filename=f"portfolio_{int(time.time())}.json")
+                ingest_portfolio_and_save(p, filename="portfolio_%d.json" % int(_time()))
             else:
                 LOG.warning("Portfolio API URL not configured. Skipping actual portfolio ingestion.")
 
-            ingest_rss_and_save(rss_feeds, filename=f"rss_{int(time.time())}.json")
+            ingest_rss_and_save(rss_feeds, filename="rss_%d.json" % int(_time()))
         except Exception as e:
             LOG.exception(f"Scheduled ingestion failed: {e}")
 
-    schedule.every(interval_minutes).minutes.do(job)
-    job()  # run once immediately
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    # Run jobs on a worker thread so a slow fetch never delays the next tick.
+    # One run at a time: a tick that arrives while the previous run is still
+    # writing its output files is skipped rather than queued.
+    job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion")
+    job_lock = threading.Lock()
+
+    def submit_job():
+        if not job_lock.acquire(blocking=False):
+            LOG.warning("Previous ingestion run still in progress, skipping this one")
+            return
+        job_executor.submit(job).add_done_callback(lambda _: job_lock.release())
+
+    schedule.every(interval_minutes).minutes.do(submit_job).tag("legacy_ingestion")
+    submit_job()  # run once immediately
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    finally:
+        schedule.clear("legacy_ingestion")
+        # Let a run in progress finish its writes before exiting
+        job_executor.shutdown(wait=True)
 
 
 def run_category_based_ingestion(categories: List[str] = None, 
@@ -9,7 +9,7 @@ from pathlib import Path
 # Import utilities with fallback for standalone execution
 try:
     from .utils import LOG, DATA_DIR
-    from .clean_data import prepare_article_for_embeddings
+    from .clean_data import prepare_articles_for_embeddings
     # Import RSS configuration
     try:
         from .rss_config import get_feeds_by_category, get_feeds_by_name, get_all_feed_urls, get_feeds_for_testing
@@ -22,7 +22,7 @@ try:
 except ImportError:
     # Fallback for standalone execution
     from utils import LOG, DATA_DIR
-    from clean_data import prepare_article_for_embeddings
+    from clean_data import prepare_articles_for_embeddings
     try:
         from rss_config import get_feeds_by_category, get_feeds_by_name, get_all_feed_urls, get_feeds_for_testing
     except ImportError:
@@ -34,7 +34,9 @@ except ImportError:
 
 
 def fetch_news_from_rss(rss_urls: List[str], max_entries_per_feed: int = 50, 
-                        timeout: int = 30, retry_attempts: int = 3) -> List[Dict[str, Any]]:
+                        timeout: int = 30, retry_attempts: int = 3,
+                        metadata_only: bool = False,
+                        session: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
     """
     Fetch news from RSS feeds with enhanced error handling and retry logic
     
@@ -43,20 +45,32 @@ def fetch_news_from_rss(rss_urls: List[str], max_entries_per_feed: int = 50,
         max_entries_per_feed: Maximum number of entries to fetch per feed
         timeout: Request timeout in seconds
         retry_attempts: Number of retry attempts for failed feeds
+        metadata_only: Skip feedparser's HTML sanitizing and full-content assembly;
+            content is left as the raw summary string
+        session: Optional requests.Session used to download the feeds, so pooled
+            connections are reused across feeds and calls
     
     Returns:
         List of article dictionaries
     """
     LOG.info(f"Fetching RSS feeds ({len(rss_urls)} feeds)")
     articles = []
+    parse_options = {"sanitize_html": False, "resolve_relative_uris": False} if metadata_only else {}
     
     for url in rss_urls:
         for attempt in range(retry_attempts):
             try:
                 LOG.debug(f"Fetching RSS feed: {url} (attempt {attempt + 1})")
                 
-                # Parse RSS feed
-                d = feedparser.parse(url)
+                # Parse RSS feed; metadata-only callers skip the HTML sanitizer and URI rewriting
+                if session is not None:
+                    resp = session.get(url, timeout=timeout)
+                    resp.raise_for_status()
+                    response_headers = {key.lower(): value for key, value in resp.headers.items()}
+                    response_headers.setdefault("content-location", resp.url)
+                    d = feedparser.parse(resp.content, response_headers=response_headers, **parse_options)
+                else:
+                    d = feedparser.parse(url, **parse_options)
                 
                 if d.bozo:
                     LOG.warning(f"Feed parse issue for {url}: {d.bozo_exception}")
@@ -78,7 +92,7 @@ def fetch_news_from_rss(rss_urls: List[str], max_entries_per_feed: int = 50,
                         summary = entry.get("summary", "").strip()
                         content = entry.get("content", [])
                         
-                        if content:
+                        if content and not metadata_only:
                             # Handle different content formats
                             if isinstance(content, list):
                                 content_text = " ".join([c.get("value", "") for c in content])
@@ -124,7 +138,8 @@ def fetch_news_from_rss(rss_urls: List[str], max_entries_per_feed: int = 50,
 
 def fetch_news_from_newsapi(api_key: str, query: str = "stock market", 
                            from_date: Optional[str] = None, page_size: int = 100,
-                           timeout: int = 30) -> List[Dict[str, Any]]:
+                           timeout: int = 30,
+                           session: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
     """
     Fetch news from NewsAPI with enhanced error handling
     
@@ -134,6 +149,7 @@ def fetch_news_from_newsapi(api_key: str, query: str = "stock market",
         from_date: Start date for search (YYYY-MM-DD format)
         page_size: Number of articles per page (max 100)
         timeout: Request timeout in seconds
+        session: Optional requests.Session to reuse pooled connections
     
     Returns:
         List of article dictionaries
@@ -154,7 +170,7 @@ def fetch_news_from_newsapi(api_key: str, query: str = "stock market",
     headers = {"Authorization": f"Bearer {api_key}"}
     
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=timeout)
+        resp = (session or requests).get(url, params=params, headers=headers, timeout=timeout)
         resp.raise_for_status()
         
         payload = resp.json()
@@ -204,13 +220,15 @@ def fetch_news_from_newsapi(api_key: str, query: str = "stock market",
         return []
 
 
-def fetch_news_by_category(category: str, max_entries_per_feed: int = 50) -> List[Dict[str, Any]]:
+def fetch_news_by_category(category: str, max_entries_per_feed: int = 50,
+                           session: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
     """
     Fetch news from RSS feeds by category using the RSS configuration
     
     Args:
         category: News category (business, markets, analysis, crypto, regional)
         max_entries_per_feed: Maximum entries per feed
+        session: Optional requests.Session shared across the feed downloads
     
     Returns:
         List of article dictionaries
@@ -223,16 +241,18 @@ def fetch_news_by_category(category: str, max_entries_per_feed: int = 50) -> Lis
     urls = [feed.url for feed in feeds]
     LOG.info(f"Fetching {len(urls)} RSS feeds for category: {category}")
     
-    return fetch_news_from_rss(urls, max_entries_per_feed)
+    return fetch_news_from_rss(urls, max_entries_per_feed, session=session)
 
 
-def fetch_news_by_feed_names(feed_names: List[str], max_entries_per_feed: int = 50) -> List[Dict[str, Any]]:
+def fetch_news_by_feed_names(feed_names: List[str], max_entries_per_feed: int = 50,
+                             session: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
     """
     Fetch news from specific RSS feeds by name
     
     Args:
         feed_names: List of feed names to fetch from
         max_entries_per_feed: Maximum entries per feed
+        session: Optional requests.Session shared across the feed downloads
     
     Returns:
         List of article dictionaries
@@ -245,7 +265,7 @@ def fetch_news_by_feed_names(feed_names: List[str], max_entries_per_feed: int =
     urls = [feed.url for feed in feeds]
     LOG.info(f"Fetching {len(urls)} RSS feeds: {feed_names}")
     
-    return fetch_news_from_rss(urls, max_entries_per_feed)
+    return fetch_news_from_rss(urls, max_entries_per_feed, session=session)
 
 
 def ingest_rss_and_save(rss_urls: List[str], filename: str = "rss_articles.json", 
@@ -269,9 +289,7 @@ def ingest_rss_and_save(rss_urls: List[str], filename: str = "rss_articles.json"
         articles = []
     
     if chunk:
-        docs = []
-        for a in articles:
-            docs.extend(prepare_article_for_embeddings(a))
+        docs = prepare_articles_for_embeddings(articles)
         try:
             from .utils import save_json
         except ImportError:
@@ -310,9 +328,7 @@ def ingest_newsapi_and_save(api_key: str, query: str = "stock market",
         articles = []
     
     if chunk:
-        docs = []
-        for a in articles:
-            docs.extend(prepare_article_for_embeddings(a))
+        docs = prepare_articles_for_embeddings(articles)
         try:
             from .utils import save_json
         except ImportError:
@@ -351,9 +367,7 @@ def ingest_category_and_save(category: str, filename: str = None,
     articles = fetch_news_by_category(category, max_entries_per_feed)
     
     if chunk:
-        docs = []
-        for a in articles:
-            docs.extend(prepare_article_for_embeddings(a))
+        docs = prepare_articles_for_embeddings(articles)
         try:
             from .utils import save_json
         except ImportError:
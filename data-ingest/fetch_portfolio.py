@@ -6,21 +6,25 @@ import requests
 from .utils import LOG, DATA_DIR
 
 
+def _to_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value) if value else default
+    except (TypeError, ValueError):
+        return default
+
+
 def load_portfolio_from_csv(csv_path: Path) -> List[Dict[str, Any]]:
     """Load a portfolio CSV with headers like: symbol, quantity, avg_price, instrument_type"""
     LOG.info(f"Loading portfolio from CSV: {csv_path}")
     positions = []
     with open(csv_path, newline="", encoding="utf-8") as csvfile:
         reader = csv.DictReader(csvfile)
+        # Normalize headers once (e.g. "Avg Price " -> "avg_price") so rows use canonical keys
+        if reader.fieldnames:
+            reader.fieldnames = [h.strip().lower().replace(" ", "_") for h in reader.fieldnames]
         for row in reader:
-            try:
-                row["quantity"] = float(row.get("quantity", 0) or 0)
-            except Exception:
-                row["quantity"] = 0
-            try:
-                row["avg_price"] = float(row.get("avg_price", 0) or 0)
-            except Exception:
-                row["avg_price"] = 0
+            row["quantity"] = _to_float(row.get("quantity"))
+            row["avg_price"] = _to_float(row.get("avg_price"))
             positions.append(row)
     LOG.info(f"Loaded {len(positions)} positions")
     return positions
@@ -8,8 +8,10 @@ import sys
 import json
 import signal
 import logging
+import threading
+from collections import ChainMap
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 # Add project root to path
 current_dir = Path(__file__).parent
@@ -18,19 +20,85 @@ sys.path.append(str(project_root))
 sys.path.append(str(project_root / "api" / "services"))
 sys.path.append(str(project_root / "data-ingest"))
 
+# Create logs directory before the file handler opens it
+LOGS_DIR = project_root / "logs"
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler(project_root / "logs" / "scheduler.log", mode='a')
+        logging.FileHandler(LOGS_DIR / "scheduler.log", mode='a')
     ]
 )
 logger = logging.getLogger(__name__)
 
-# Create logs directory if it doesn't exist
-(project_root / "logs").mkdir(exist_ok=True)
+
+def _to_bool(value: str) -> bool:
+    return value.lower() == 'true'
+
+
+def _to_list(value: str) -> List[str]:
+    return value.split(',')
+
+
+# (dotted config path, environment variable, coercion, default)
+_ENV_SCHEMA: Tuple[Tuple[str, str, Callable[[str], Any], Any], ...] = (
+    ('scheduler.fetch_interval_minutes', 'RSS_FETCH_INTERVAL_MINUTES', int, 30),
+    ('scheduler.max_articles_per_feed', 'RSS_MAX_ARTICLES_PER_FEED', int, 20),
+    ('scheduler.categories_to_fetch', 'RSS_CATEGORIES', _to_list, ['business', 'markets', 'analysis']),
+    ('scheduler.enable_all_feeds', 'RSS_ENABLE_ALL_FEEDS', _to_bool, False),
+    ('scheduler.batch_size', 'RSS_BATCH_SIZE', int, 50),
+    ('scheduler.enable_on_startup', 'RSS_ENABLE_ON_STARTUP', _to_bool, True),
+    ('scheduler.cleanup_old_data', 'RSS_CLEANUP_OLD_DATA', _to_bool, True),
+    ('scheduler.max_data_age_days', 'RSS_MAX_DATA_AGE_DAYS', int, 30),
+    ('vector_service.embedding.model_name', 'EMBEDDING_MODEL_NAME', str, 'jina-embeddings-v3'),
+    ('vector_service.embedding.model_type', 'EMBEDDING_MODEL_TYPE', str, 'jina'),
+    ('vector_service.embedding.jina_api_key', 'JINA_API_KEY', str, None),
+    ('vector_service.embedding.cache_dir', 'EMBEDDING_CACHE_DIR', str, './vector_services/embeddings'),
+    ('vector_service.chroma.persist_directory', 'CHROMA_PERSIST_DIR', str, './vector_services/chroma_db'),
+    ('vector_service.chroma.collection_name', 'CHROMA_COLLECTION_NAME', str, 'finsight_documents'),
+    ('vector_service.document.storage_dir', 'DOCUMENT_STORAGE_DIR', str, './vector_services/documents'),
+)
+
+# Built-in defaults, keyed by dotted config path
+DEFAULT_CONFIG: Dict[str, Any] = {key: default for key, _, _, default in _ENV_SCHEMA}
+
+
+def _load_env_overrides() -> Dict[str, Any]:
+    """Read and coerce every environment override in one pass over the schema"""
+    env = os.environ
+    overrides = {}
+    for key, env_name, coerce, _ in _ENV_SCHEMA:
+        value = env.get(env_name)
+        if value is not None:
+            overrides[key] = coerce(value)
+    return overrides
+
+
+def _flatten(config: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flatten nested sections into dotted keys"""
+    flat = {}
+    for key, value in config.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _unflatten(flat: Mapping[str, Any]) -> Dict[str, Any]:
+    """Rebuild nested sections from dotted keys"""
+    config: Dict[str, Any] = {}
+    for dotted_key, value in flat.items():
+        *sections, key = dotted_key.split('.')
+        node = config
+        for section in sections:
+            node = node.setdefault(section, {})
+        node[key] = value
+    return config
 
 
 def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
@@ -43,82 +111,75 @@ def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Configuration dictionary
     """
-    config = {}
+    file_config: Dict[str, Any] = {}
+    
+    # Load from JSON file if provided, otherwise the default config file
+    if config_path:
+        path = Path(config_path)
+        label = "configuration"
+    else:
+        path = project_root / "scheduler_config.json"
+        label = "default configuration"
     
-    # Load from JSON file if provided
-    if config_path and Path(config_path).exists():
+    if path.exists():
         try:
-            with open(config_path, 'r') as f:
-                file_config = json.load(f)
-                config.update(file_config)
-                logger.info(f"Loaded configuration from {config_path}")
+            with open(path, 'r') as f:
+                file_config = _flatten(json.load(f))
+            logger.info(f"Loaded {label} from {path}")
         except Exception as e:
-            logger.error(f"Error loading config file {config_path}: {e}")
+            logger.error(f"Error loading {label} {path}: {e}")
     
-    # Load default config file if no specific path provided
-    elif not config_path:
-        default_config_path = project_root / "scheduler_config.json"
-        if default_config_path.exists():
-            try:
-                with open(default_config_path, 'r') as f:
-                    file_config = json.load(f)
-                    config.update(file_config)
-                    logger.info(f"Loaded default configuration from {default_config_path}")
-            except Exception as e:
-                logger.error(f"Error loading default config: {e}")
-    
-    # Override with environment variables
-    env_config = {
-        'scheduler': {
-            'fetch_interval_minutes': int(os.getenv('RSS_FETCH_INTERVAL_MINUTES', 
-                                                  config.get('scheduler', {}).get('fetch_interval_minutes', 30))),
-            'max_articles_per_feed': int(os.getenv('RSS_MAX_ARTICLES_PER_FEED', 
-                                                 config.get('scheduler', {}).get('max_articles_per_feed', 20))),
-            'categories_to_fetch': os.getenv('RSS_CATEGORIES', 
-                                           ','.join(config.get('scheduler', {}).get('categories_to_fetch', 
-                                                                                   ['business', 'markets', 'analysis']))).split(','),
-            'enable_all_feeds': os.getenv('RSS_ENABLE_ALL_FEEDS', 
-                                        str(config.get('scheduler', {}).get('enable_all_feeds', False))).lower() == 'true',
-            'batch_size': int(os.getenv('RSS_BATCH_SIZE', 
-                                      config.get('scheduler', {}).get('batch_size', 50))),
-            'enable_on_startup': os.getenv('RSS_ENABLE_ON_STARTUP', 
-                                         str(config.get('scheduler', {}).get('enable_on_startup', True))).lower() == 'true',
-            'cleanup_old_data': os.getenv('RSS_CLEANUP_OLD_DATA', 
-                                        str(config.get('scheduler', {}).get('cleanup_old_data', True))).lower() == 'true',
-            'max_data_age_days': int(os.getenv('RSS_MAX_DATA_AGE_DAYS', 
-                                             config.get('scheduler', {}).get('max_data_age_days', 30)))
-        },
+    # Environment variables take precedence over the file, which overrides defaults
+    merged = ChainMap(_load_env_overrides(), file_config, DEFAULT_CONFIG)
+    
+    # Only the scheduler and vector service sections are consumed downstream
+    return {
+        section: values
+        for section, values in _unflatten(merged).items()
+        if section in ('scheduler', 'vector_service')
+    }
+
+
+def _redact_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of the config with secrets masked for logging"""
+    vector_service = config.get('vector_service', {})
+    embedding = vector_service.get('embedding', {})
+    if not embedding.get('jina_api_key'):
+        return config
+    return {
+        **config,
         'vector_service': {
-            'embedding': {
-                'model_name': os.getenv('EMBEDDING_MODEL_NAME', 
-                                      config.get('vector_service', {}).get('embedding', {}).get('model_name', 'jina-embeddings-v3')),
-                'model_type': os.getenv('EMBEDDING_MODEL_TYPE', 
-                                      config.get('vector_service', {}).get('embedding', {}).get('model_type', 'jina')),
-                'jina_api_key': os.getenv('JINA_API_KEY', 
-                                        config.get('vector_service', {}).get('embedding', {}).get('jina_api_key')),
-                'cache_dir': os.getenv('EMBEDDING_CACHE_DIR', 
-                                     config.get('vector_service', {}).get('embedding', {}).get('cache_dir', './vector_services/embeddings'))
-            },
-            'chroma': {
-                'persist_directory': os.getenv('CHROMA_PERSIST_DIR', 
-                                             config.get('vector_service', {}).get('chroma', {}).get('persist_directory', './vector_services/chroma_db')),
-                'collection_name': os.getenv('CHROMA_COLLECTION_NAME', 
-                                           config.get('vector_service', {}).get('chroma', {}).get('collection_name', 'finsight_documents'))
-            },
-            'document': {
-                'storage_dir': os.getenv('DOCUMENT_STORAGE_DIR', 
-                                       config.get('vector_service', {}).get('document', {}).get('storage_dir', './vector_services/documents'))
-            }
+            **vector_service,
+            'embedding': {**embedding, 'jina_api_key': '***'}
         }
     }
+
+
+def start_stats_heartbeat(scheduler, interval_seconds: int = 60) -> threading.Event:
+    """
+    Log scheduler statistics periodically from a daemon thread
     
-    # Merge configurations
-    final_config = {
-        'scheduler': env_config['scheduler'],
-        'vector_service': env_config['vector_service']
-    }
+    Args:
+        scheduler: Running scheduler service instance
+        interval_seconds: Seconds between stats log lines
     
-    return final_config
+    Returns:
+        Event that stops the heartbeat when set
+    """
+    stop_event = threading.Event()
+    
+    def heartbeat():
+        while not stop_event.wait(interval_seconds):
+            stats = getattr(scheduler, 'fetch_stats', None)
+            if stats is None:
+                continue
+            logger.info(f"Scheduler stats - Total fetches: {stats.get('total_fetches', 0)}, "
+                      f"Successful: {stats.get('successful_fetches', 0)}, "
+                      f"Failed: {stats.get('failed_fetches', 0)}, "
+                      f"Total articles: {stats.get('total_articles', 0)}")
+    
+    threading.Thread(target=heartbeat, daemon=True, name="Scheduler-Stats").start()
+    return stop_event
 
 
 def main():
@@ -129,13 +190,16 @@ def main():
     import argparse
     parser = argparse.ArgumentParser(description='FinSightAI RSS Scheduler')
     parser.add_argument('--config', '-c', type=str, help='Path to configuration file')
-    parser.add_argument('--interval', '-i', type=int, help='Fetch interval in minutes')
+    parser.add_argument('--interval', '-i', type=int,
+                        help=f"Fetch interval in minutes (default: {DEFAULT_CONFIG['scheduler.fetch_interval_minutes']})")
     parser.add_argument('--categories', type=str, help='Comma-separated list of categories to fetch')
     parser.add_argument('--all-feeds', action='store_true', help='Fetch from all configured feeds')
     parser.add_argument('--no-startup-fetch', action='store_true', help='Disable immediate fetch on startup')
     parser.add_argument('--dry-run', action='store_true', help='Run without actually storing data')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable debug logging, including the resolved configuration')
     
     args = parser.parse_args()
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
     
     # Load configuration
     config = load_config(args.config)
@@ -153,7 +217,8 @@ def main():
     if args.no_startup_fetch:
         config['scheduler']['enable_on_startup'] = False
     
-    logger.info(f"Configuration: {json.dumps(config, indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Configuration: {json.dumps(_redact_config(config), indent=2)}")
     
     # Initialize scheduler
     scheduler = None
@@ -171,9 +236,13 @@ def main():
         if scheduler.start_scheduler():
             logger.info("RSS Scheduler started successfully")
             
+            # Log stats from a dedicated thread instead of polling in the main loop
+            heartbeat_stop = start_stats_heartbeat(scheduler, interval_seconds=60)
+            
             # Set up signal handlers for graceful shutdown
             def signal_handler(signum, frame):
                 logger.info(f"Received signal {signum}, shutting down gracefully...")
+                heartbeat_stop.set()
                 if scheduler:
                     scheduler.stop_scheduler()
                 cleanup_scheduler_service()
@@ -191,21 +260,21 @@ def main():
             logger.info("Scheduler is running. Press Ctrl+C to stop.")
             
             try:
-                import time
-                while True:
-                    time.sleep(60)  # Check every minute
-                    
-                    # Periodically log status
-                    if hasattr(scheduler, 'fetch_stats'):
-                        stats = scheduler.fetch_stats
-                        logger.info(f"Scheduler stats - Total fetches: {stats.get('total_fetches', 0)}, "
-                                  f"Successful: {stats.get('successful_fetches', 0)}, "
-                                  f"Failed: {stats.get('failed_fetches', 0)}, "
-                                  f"Total articles: {stats.get('total_articles', 0)}")
+                # Block until a signal arrives; stats are logged by the heartbeat thread
+                if hasattr(signal, 'pause'):
+                    while True:
+                        signal.pause()
+                else:
+                    # Windows has no signal.pause()
+                    import time
+                    while True:
+                        time.sleep(3600)
                         
             except KeyboardInterrupt:
                 logger.info("Keyboard interrupt received, shutting down...")
                 scheduler.stop_scheduler()
+            finally:
+                heartbeat_stop.set()
                 
         else:
             logger.error("Failed to start RSS scheduler")
@@ -9,13 +9,22 @@ This script will:
 4. Demonstrate different search types (semantic, text, hybrid)
 """
 
+import io
 import os
 import sys
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+# orjson serializes NumPy arrays natively and is much faster; fall back to json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Add project paths to sys.path
 project_root = Path(__file__).parent
@@ -50,6 +59,7 @@ class DatabaseTester:
             
             logger.info("Initializing Vector Service Manager...")
             self.vector_manager = VectorServiceManager(base_dir="./vector_services")
+            self.vector_manager.warmup()
             logger.info("✅ Vector Service Manager initialized successfully")
             return True
             
@@ -117,8 +127,16 @@ class DatabaseTester:
             self.test_results['errors'].append(error_msg)
             return {"error": str(e)}
     
-    def populate_test_data(self) -> bool:
-        """Populate the database with test financial data"""
+    def populate_test_data(self, quantize: bool = False) -> Tuple[bool, int]:
+        """
+        Populate the database with test financial data
+        
+        Args:
+            quantize: Store the document embeddings as int8 instead of float32
+        
+        Returns:
+            Tuple of (success, number of distinct documents added)
+        """
         logger.info("\n" + "="*50)
         logger.info("POPULATING TEST DATA")
         logger.info("="*50)
@@ -217,19 +235,27 @@ class DatabaseTester:
             doc_ids = self.vector_manager.add_documents(
                 test_documents,
                 generate_embeddings=True,
-                add_to_vector_db=True
+                add_to_vector_db=True,
+                quantize=quantize
             )
             
+            # Tokenize the corpus once so text/hybrid queries only score
+            indexed = self.vector_manager.build_bm25_index()
+            logger.info(f"Built BM25 index over {indexed} documents")
+            
+            embedding_dim = self.vector_manager.embedding_service.embedding_dim
+            logger.info(f"Embedded {len(set(doc_ids))} documents x {embedding_dim} dimensions")
+            
             logger.info(f"✅ Successfully added {len(doc_ids)} documents")
             logger.info(f"Document IDs: {doc_ids[:3]}..." if len(doc_ids) > 3 else f"Document IDs: {doc_ids}")
             
-            return True
+            return True, len(set(doc_ids))
             
         except Exception as e:
             error_msg = f"Error populating test data: {e}"
             logger.error(error_msg)
             self.test_results['errors'].append(error_msg)
-            return False
+            return False, 0
     
     def test_search_functionality(self) -> Dict[str, Any]:
         """Test different types of search functionality"""
@@ -268,66 +294,124 @@ class DatabaseTester:
             }
         ]
         
-        for test_query in test_queries:
-            try:
-                logger.info(f"\n🔍 Testing: {test_query['description']}")
-                logger.info(f"   Query: '{test_query['query']}'")
-                logger.info(f"   Type: {test_query['search_type']}")
-                
-                # Perform search
-                results = self.vector_manager.search(
-                    query=test_query['query'],
-                    search_type=test_query['search_type'],
-                    n_results=3,
-                    metadata_filters=test_query.get('metadata_filters')
-                )
-                
-                # Process results
-                if results:
-                    logger.info(f"   ✅ Found {len(results)} results")
-                    
-                    # Display top results
-                    for i, result in enumerate(results[:2], 1):
-                        doc_text = result.get('text', result.get('document', ''))[:100]
-                        metadata = result.get('metadata', {})
-                        score = result.get('score', result.get('distance', 'N/A'))
-                        
-                        logger.info(f"   Result {i}:")
-                        logger.info(f"     - Text: {doc_text}...")
-                        logger.info(f"     - Score: {score}")
-                        logger.info(f"     - Category: {metadata.get('category', 'N/A')}")
-                        logger.info(f"     - Source: {metadata.get('source', 'N/A')}")
-                    
-                    search_results[test_query['name']] = {
-                        'query': test_query['query'],
-                        'search_type': test_query['search_type'],
-                        'result_count': len(results),
-                        'top_results': results[:3],
-                        'status': 'success'
-                    }
-                else:
-                    logger.info("   ❌ No results found")
-                    search_results[test_query['name']] = {
-                        'query': test_query['query'],
-                        'search_type': test_query['search_type'],
-                        'result_count': 0,
-                        'status': 'no_results'
-                    }
-                
-            except Exception as e:
-                error_msg = f"Error in search test '{test_query['name']}': {e}"
+        from search_service import results_to_columns
+        
+        # Embed every query in one call, then run one batched search per
+        # (search_type, metadata_filters) group
+        batch_results, batch_errors = self._run_batched_searches(test_queries, n_results=3)
+        
+        for index, test_query in enumerate(test_queries):
+            logger.info(f"\n🔍 Testing: {test_query['description']}")
+            logger.info(f"   Query: '{test_query['query']}'")
+            logger.info(f"   Type: {test_query['search_type']}")
+            
+            if index in batch_errors:
+                error_msg = f"Error in search test '{test_query['name']}': {batch_errors[index]}"
                 logger.error(error_msg)
                 search_results[test_query['name']] = {
                     'query': test_query['query'],
                     'search_type': test_query['search_type'],
                     'status': 'error',
-                    'error': str(e)
+                    'error': str(batch_errors[index])
                 }
                 self.test_results['errors'].append(error_msg)
+                continue
+            
+            results = batch_results.get(index, [])
+            
+            # Process results
+            if results:
+                logger.info(f"   ✅ Found {len(results)} results")
+                
+                # Display top results straight from the result columns
+                _, texts, metadatas, scores = results_to_columns(results[:2])
+                for i, (doc_text, metadata, score) in enumerate(zip(texts, metadatas, scores), 1):
+                    logger.info(f"   Result {i}:")
+                    logger.info(f"     - Text: {doc_text[:100]}...")
+                    logger.info(f"     - Score: {score}")
+                    logger.info(f"     - Category: {metadata.get('category', 'N/A')}")
+                    logger.info(f"     - Source: {metadata.get('source', 'N/A')}")
+                
+                search_results[test_query['name']] = {
+                    'query': test_query['query'],
+                    'search_type': test_query['search_type'],
+                    'result_count': len(results),
+                    'top_results': results[:3],
+                    'status': 'success'
+                }
+            else:
+                logger.info("   ❌ No results found")
+                search_results[test_query['name']] = {
+                    'query': test_query['query'],
+                    'search_type': test_query['search_type'],
+                    'result_count': 0,
+                    'status': 'no_results'
+                }
         
         self.test_results['search_tests'] = search_results
         return search_results
     
+    def _run_batched_searches(self, 
+                              test_queries: List[Dict[str, Any]],
+                              n_results: int = 3,
+                              max_workers: int = 4) -> Tuple[Dict[int, List[Any]], Dict[int, Exception]]:
+        """
+        Run the test queries with one embedding call and one search per group
+        
+        Returns:
+            Results and errors keyed by the query's index in test_queries
+        """
+        queries = [test_query['query'] for test_query in test_queries]
+        
+        # Text search never needs embeddings; embed the rest in one forward pass
+        embed_indices = [i for i, test_query in enumerate(test_queries)
+                         if test_query['search_type'] != 'text']
+        query_embeddings: Dict[int, List[float]] = {}
+        if embed_indices:
+            try:
+                embeddings = self.vector_manager.embedding_service.encode(
+                    [queries[i] for i in embed_indices]
+                )
+                query_embeddings = dict(zip(embed_indices, embeddings))
+            except Exception as e:
+                logger.warning(f"Batch query embedding failed, searches will embed individually: {e}")
+        
+        # Group queries that can share a single search call
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, test_query in enumerate(test_queries):
+            filters_key = json.dumps(test_query.get('metadata_filters'), sort_keys=True)
+            groups.setdefault((test_query['search_type'], filters_key), []).append(i)
+        
+        def run_group(group: Tuple[Tuple[str, str], List[int]]) -> Tuple[List[int], List[Any], Optional[Exception]]:
+            (search_type, _), indices = group
+            embeddings = None
+            if all(i in query_embeddings for i in indices) and search_type != 'text':
+                embeddings = [query_embeddings[i] for i in indices]
+            
+            try:
+                group_results = self.vector_manager.search_batch(
+                    queries=[queries[i] for i in indices],
+                    search_type=search_type,
+                    n_results=n_results,
+                    metadata_filters=test_queries[indices[0]].get('metadata_filters'),
+                    query_embeddings=embeddings
+                )
+                return indices, group_results, None
+            except Exception as e:
+                return indices, [], e
+        
+        # Groups are independent; overlap their ChromaDB / document store calls
+        results: Dict[int, List[Any]] = {}
+        errors: Dict[int, Exception] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for indices, group_results, error in executor.map(run_group, groups.items()):
+                if error is not None:
+                    errors.update((i, error) for i in indices)
+                else:
+                    results.update(zip(indices, group_results))
+        
+        return results, errors
+    
     def test_specialized_searches(self) -> Dict[str, Any]:
         """Test specialized search functions"""
         logger.info("\n" + "="*50)
@@ -380,12 +464,11 @@ class DatabaseTester:
         logger.info("GENERATING TEST REPORT")
         logger.info("="*50)
         
-        report_lines = [
-            "# FinSightAI Database and Search Test Report",
-            f"Generated on: {self.test_results['timestamp']}",
-            "",
-            "## Database Status"
-        ]
+        buf = io.StringIO()
+        w = buf.write
+        w("# FinSightAI Database and Search Test Report\n")
+        w(f"Generated on: {self.test_results['timestamp']}\n\n")
+        w("## Database Status\n")
         
         # Database status
         db_status = self.test_results.get('database_status', {})
@@ -395,51 +478,78 @@ class DatabaseTester:
             chroma_info = services.get('chroma', {})
             doc_count = chroma_info.get('document_count', 0)
             
-            report_lines.extend([
-                f"- Documents in database: {doc_count}",
-                f"- Collection name: {chroma_info.get('collection_name', 'N/A')}",
-                f"- Embedding model: {services.get('embedding', {}).get('model_name', 'N/A')}",
-                ""
-            ])
+            w(f"- Documents in database: {doc_count}\n")
+            w(f"- Collection name: {chroma_info.get('collection_name', 'N/A')}\n")
+            w(f"- Embedding model: {services.get('embedding', {}).get('model_name', 'N/A')}\n\n")
         
         # Search test results
-        report_lines.append("## Search Test Results")
+        w("## Search Test Results\n")
         search_tests = self.test_results.get('search_tests', {})
         
         for test_name, result in search_tests.items():
             status = "✅" if result['status'] == 'success' else "❌"
-            report_lines.extend([
-                f"### {test_name} {status}",
-                f"- Query: '{result['query']}'",
-                f"- Search Type: {result['search_type']}",
-                f"- Results Found: {result.get('result_count', 0)}",
-                ""
-            ])
+            w(f"### {test_name} {status}\n")
+            w(f"- Query: '{result['query']}'\n")
+            w(f"- Search Type: {result['search_type']}\n")
+            w(f"- Results Found: {result.get('result_count', 0)}\n\n")
         
         # Errors
         if self.test_results.get('errors'):
-            report_lines.extend([
-                "## Errors Encountered",
-                ""
-            ])
+            w("## Errors Encountered\n\n")
             for error in self.test_results['errors']:
-                report_lines.append(f"- {error}")
+                w(f"- {error}\n")
         
-        report_content = "\n".join(report_lines)
+        report_content = buf.getvalue()
         
         # Save report to file
         report_path = f"database_test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
         try:
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(report_content)
+            Path(report_path).write_text(report_content, encoding='utf-8')
             logger.info(f"📄 Test report saved to: {report_path}")
         except Exception as e:
             logger.error(f"Failed to save report: {e}")
         
+        # Save raw results as a JSON sidecar for CI
+        json_path = report_path.replace('.md', '.json')
+        try:
+            self._write_results_json(json_path)
+            logger.info(f"📄 Test results saved to: {json_path}")
+        except Exception as e:
+            logger.error(f"Failed to save test results: {e}")
+        
         return report_content
     
-    def run_comprehensive_test(self, populate_data: bool = True) -> bool:
-        """Run the complete test suite"""
+    def _write_results_json(self, json_path: str) -> None:
+        """Serialize test_results, including search result objects and arrays"""
+        def default(obj: Any) -> Any:
+            if hasattr(obj, 'to_dict'):
+                return obj.to_dict()
+            if hasattr(obj, 'tolist'):
+                return obj.tolist()
+            return str(obj)
+        
+        if ORJSON_AVAILABLE:
+            Path(json_path).write_bytes(orjson.dumps(
+                self.test_results,
+                default=default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ))
+        else:
+            Path(json_path).write_text(
+                json.dumps(self.test_results, indent=2, ensure_ascii=False, default=default),
+                encoding='utf-8'
+            )
+    
+    def run_comprehensive_test(self, populate_data: bool = True, check_only: bool = False,
+                               quantize: bool = False) -> bool:
+        """
+        Run the complete test suite
+        
+        Args:
+            populate_data: Populate test data when the database is empty
+            check_only: Only report database status, skipping searches and the report
+            quantize: Store populated test embeddings as int8 instead of float32
+        """
         logger.info("🚀 Starting comprehensive database and search test...")
         
         try:
@@ -450,16 +560,27 @@ class DatabaseTester:
             # Step 2: Check current database status
             self.check_database_status()
             
+            if check_only:
+                logger.info("✅ Database status check completed")
+                return True
+            
             # Step 3: Populate test data if requested and database is empty
             current_doc_count = self.test_results.get('database_status', {}).get('services', {}).get('chroma', {}).get('document_count', 0)
             
             if populate_data and current_doc_count == 0:
                 logger.info("📝 Database is empty, populating with test data...")
-                if not self.populate_test_data():
+                populated, added_count = self.populate_test_data(quantize=quantize)
+                if not populated:
                     return False
                 
-                # Re-check status after populating data
-                self.check_database_status()
+                # Populating already tells us the new count; only re-query when the
+                # earlier status did not include one
+                chroma_status = self.test_results.get('database_status', {}).get('services', {}).get('chroma', {})
+                if 'document_count' in chroma_status:
+                    chroma_status['document_count'] += added_count
+                    logger.info(f"📊 Database now contains {chroma_status['document_count']} documents")
+                else:
+                    self.check_database_status()
             elif current_doc_count > 0:
                 logger.info(f"📊 Database already contains {current_doc_count} documents")
             
@@ -484,6 +605,15 @@ class DatabaseTester:
 
 def main():
     """Main function to run the database test"""
+    # Parse arguments before anything touches the vector service, so --help and
+    # bad arguments return without paying for the heavy imports
+    import argparse
+    parser = argparse.ArgumentParser(description='FinSightAI database and search functionality test')
+    parser.add_argument('--check-only', action='store_true', help='Only check database status')
+    parser.add_argument('--no-populate', action='store_true', help='Do not populate test data into an empty database')
+    parser.add_argument('--quantize', action='store_true', help='Store populated test embeddings as int8 instead of float32')
+    args = parser.parse_args()
+    
     print("="*60)
     print("   FinSightAI Database and Search Functionality Test")
     print("="*60)
@@ -492,7 +622,11 @@ def main():
     tester = DatabaseTester()
     
     # Run comprehensive test
-    success = tester.run_comprehensive_test(populate_data=True)
+    success = tester.run_comprehensive_test(
+        populate_data=not args.no_populate,
+        check_only=args.check_only,
+        quantize=args.quantize
+    )
     
     if success:
         print("\n🎉 All tests completed successfully!")
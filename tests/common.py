@@ -0,0 +1,75 @@
+"""
+Shared Helpers for the Smoke-Test Scripts
+Process-wide embedding service, per-thread HTTP sessions, and JSON result writing that
+uses orjson when it is installed.
+"""
+import json
+import functools
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+import requests
+
+# orjson serializes in C, with native datetime and NumPy support; fall back to json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Add the project source directories to sys.path
+import project_paths  # noqa: F401
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedding_service():
+    """Embedding service shared by every test in this process, created on first use"""
+    from embedding_service import create_embedding_service
+    return create_embedding_service()
+
+
+# requests.Session is not thread-safe, so each thread keeps its own
+_http_local = threading.local()
+
+
+def get_http_session() -> requests.Session:
+    """HTTP session for the calling thread, so its feed and API requests reuse pooled connections"""
+    session = getattr(_http_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers["User-Agent"] = "FinSightAI"
+        _http_local.session = session
+    return session
+
+
+def _json_default(obj: Any) -> Any:
+    # Datetimes and NumPy values, which the orjson path serializes natively
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def write_json(path: Union[str, Path], data: Any,
+               default: Optional[Callable[[Any], Any]] = None) -> None:
+    """
+    Write data as indented UTF-8 JSON
+
+    Args:
+        path: Output file path
+        data: JSON-serializable data; datetimes and NumPy arrays are also accepted
+        default: Fallback serializer for any other types
+    """
+    path = Path(path)
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        path.write_bytes(orjson.dumps(data, default=default, option=option))
+    else:
+        path.write_text(
+            json.dumps(data, indent=2, ensure_ascii=False, default=default or _json_default),
+            encoding='utf-8'
+        )
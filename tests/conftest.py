@@ -0,0 +1,8 @@
+"""
+Pytest configuration for FinSightAI tests
+"""
+
+
+def pytest_configure(config):
+    """Put the project source directories on sys.path once per session"""
+    import project_paths  # noqa: F401
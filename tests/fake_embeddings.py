@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Fake Embedding Service for Tests
+Deterministic random embeddings so vector tests run offline without a Jina API key
+"""
+import hashlib
+from typing import List
+
+import numpy as np
+
+# Add the project source directories to sys.path
+import project_paths  # noqa: F401
+from embedding_service import EmbeddingService
+
+
+class FakeEmbeddingService(EmbeddingService):
+    """
+    EmbeddingService that draws each text's embedding from a NumPy RNG seeded by the
+    normalized text (lowercased, whitespace collapsed), so texts that differ only in case
+    or spacing embed identically and no HTTP requests are made. Unrelated texts get
+    near-orthogonal vectors, so a semantic search only matches a query to a stored
+    document with the same normalized text.
+    """
+
+    def __init__(self, dim: int = 1024, seed: int = 42, **kwargs):
+        """
+        Initialize the fake embedding service
+
+        Args:
+            dim: Embedding dimension (defaults to the Jina v3 dimension)
+            seed: Base RNG seed, combined with a hash of each text
+            **kwargs: Passed through to EmbeddingService (cache settings, cache_dir)
+        """
+        self.dim = dim
+        self.seed = seed
+        kwargs.setdefault('model_name', 'fake-embeddings')
+        super().__init__(**kwargs)
+        self.model_type = "fake"
+
+    def _initialize_model(self):
+        return "fake"
+
+    def _get_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _embed_texts(self, texts: List[str], batch_size: int, normalize: bool) -> np.ndarray:
+        # Same contiguous float32 layout the Jina path produces
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(embeddings, texts):
+            normalized = " ".join(text.lower().split())
+            text_seed = int.from_bytes(hashlib.sha256(normalized.encode("utf-8")).digest()[:8], "little")
+            np.random.default_rng([self.seed, text_seed]).standard_normal(dtype=np.float32, out=row)
+
+        if normalize and len(embeddings):
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        return embeddings
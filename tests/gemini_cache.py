@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Gemini Response Cache for Tests
+Replays Gemini responses from disk so repeated test runs skip the API.
+Enable with GEMINI_TEST_CACHE=1; entries expire after one day.
+"""
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+CACHE_DIR = Path(os.getenv('GEMINI_TEST_CACHE_DIR', '.gemini_cache'))
+CACHE_TTL_SECONDS = 86400
+
+
+def cache_enabled() -> bool:
+    """Whether the on-disk response cache is switched on"""
+    return os.getenv('GEMINI_TEST_CACHE') == '1'
+
+
+def _cache_key(model: str, contents: Any, config: Any = None, variant: str = '') -> Optional[str]:
+    """Cache key for a request, or None when the cache is switched off"""
+    if not cache_enabled():
+        return None
+    if hasattr(config, 'model_dump'):
+        config = config.model_dump(exclude_none=True)
+    payload = f"{model}|{contents}|{json.dumps(config, default=str, sort_keys=True)}"
+    if variant:
+        payload += f"|{variant}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _load(key: str) -> Optional[str]:
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        entry = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get('stored_at', 0) > CACHE_TTL_SECONDS:
+        return None
+    return entry.get('text')
+
+
+def _store(key: str, text: str) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    entry = {'stored_at': time.time(), 'text': text}
+    (CACHE_DIR / f"{key}.json").write_text(json.dumps(entry), encoding='utf-8')
+
+
+def _cached(key: Optional[str], produce: Callable[[], str]) -> str:
+    """Return the cached text for key, or produce it and cache it"""
+    if key:
+        cached = _load(key)
+        if cached is not None:
+            return cached
+
+    text = produce()
+    if key:
+        _store(key, text)
+    return text
+
+
+async def _cached_async(key: Optional[str], produce: Callable[[], Awaitable[str]]) -> str:
+    """Async variant of _cached for a coroutine-producing callable"""
+    if key:
+        cached = _load(key)
+        if cached is not None:
+            return cached
+
+    text = await produce()
+    if key:
+        _store(key, text)
+    return text
+
+
+def generate_text(client, model: str, contents: Any, config: Any = None) -> str:
+    """
+    Call client.models.generate_content, serving the text from cache when enabled
+
+    Args:
+        client: google.genai Client
+        model: Model name
+        contents: Prompt contents
+        config: Optional GenerateContentConfig
+
+    Returns:
+        Response text
+    """
+    def generate() -> str:
+        return client.models.generate_content(model=model, contents=contents, config=config).text
+
+    return _cached(_cache_key(model, contents, config), generate)
+
+
+async def generate_text_async(client, model: str, contents: Any, config: Any = None) -> str:
+    """
+    Async variant of generate_text for a google.genai Client().aio client
+
+    Args:
+        client: google.genai async client
+        model: Model name
+        contents: Prompt contents
+        config: Optional GenerateContentConfig
+
+    Returns:
+        Response text
+    """
+    async def generate() -> str:
+        response = await client.models.generate_content(model=model, contents=contents, config=config)
+        return response.text
+
+    return await _cached_async(_cache_key(model, contents, config), generate)
+
+
+def preview_text(client, model: str, contents: Any, config: Any = None, max_chars: int = 200) -> str:
+    """
+    Stream a response and stop once max_chars of text have arrived
+
+    Args:
+        client: google.genai Client
+        model: Model name
+        contents: Prompt contents
+        config: Optional GenerateContentConfig
+        max_chars: Preview length; the rest of the response is never generated
+
+    Returns:
+        The first max_chars characters of the response text
+    """
+    def stream_preview() -> str:
+        preview = ""
+        stream = client.models.generate_content_stream(model=model, contents=contents, config=config)
+        try:
+            for chunk in stream:
+                preview += chunk.text or ""
+                if len(preview) >= max_chars:
+                    break
+        finally:
+            # Closing the stream cancels the request instead of draining the remaining tokens
+            if hasattr(stream, 'close'):
+                stream.close()
+        return preview[:max_chars]
+
+    return _cached(_cache_key(model, contents, config, f"preview:{max_chars}"), stream_preview)
+
+
+async def preview_text_async(client, model: str, contents: Any, config: Any = None, max_chars: int = 200) -> str:
+    """
+    Async variant of preview_text for a google.genai Client().aio client
+
+    Args:
+        client: google.genai async client
+        model: Model name
+        contents: Prompt contents
+        config: Optional GenerateContentConfig
+        max_chars: Preview length; the rest of the response is never generated
+
+    Returns:
+        The first max_chars characters of the response text
+    """
+    async def stream_preview() -> str:
+        preview = ""
+        stream = await client.models.generate_content_stream(model=model, contents=contents, config=config)
+        try:
+            async for chunk in stream:
+                preview += chunk.text or ""
+                if len(preview) >= max_chars:
+                    break
+        finally:
+            if hasattr(stream, 'aclose'):
+                await stream.aclose()
+        return preview[:max_chars]
+
+    return await _cached_async(_cache_key(model, contents, config, f"preview:{max_chars}"), stream_preview)
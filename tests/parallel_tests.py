@@ -0,0 +1,114 @@
+"""
+Parallel Runner for the Smoke-Test Scripts
+Runs independent, I/O-bound test functions on a thread or process pool and prints
+each test's output as one block, so concurrent tests do not interleave their logs.
+"""
+import io
+import sys
+import threading
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+class _ThreadStdout(io.TextIOBase):
+    """sys.stdout stand-in that routes writes to the calling thread's buffer when it has one"""
+
+    def __init__(self, target):
+        self._target = target
+        self._local = threading.local()
+
+    def _stream(self):
+        buffer = getattr(self._local, 'buffer', None)
+        return self._target if buffer is None else buffer
+
+    def write(self, text: str) -> int:
+        return self._stream().write(text)
+
+    def flush(self) -> None:
+        self._stream().flush()
+
+
+def _run_one(stdout: _ThreadStdout, name: str, func: Callable[[], Any]) -> Tuple[Any, str]:
+    stdout._local.buffer = io.StringIO()
+    try:
+        try:
+            result = func()
+        except Exception as e:
+            print(f"✗ {name} failed with exception: {e}")
+            result = None
+        return result, stdout._local.buffer.getvalue()
+    finally:
+        stdout._local.buffer = None
+
+
+def _run_in_process(name: str, func: Callable[[], Any]) -> Tuple[Any, str]:
+    # A worker process owns its sys.stdout, so a plain redirect captures the test's output
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        try:
+            result = func()
+        except Exception as e:
+            print(f"✗ {name} failed with exception: {e}")
+            result = None
+    return result, buffer.getvalue()
+
+
+def _run_in_fresh_process(name: str, func: Callable[[], Any]) -> Tuple[Any, str]:
+    # A one-shot pool, so no process-wide state carries over from another test
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_run_in_process, name, func).result()
+
+
+def run_tests(tests: List[Tuple[str, Callable[[], Any]]],
+              run_last: Sequence[str] = (),
+              max_workers: int = 4,
+              processes: bool = False) -> Dict[str, Any]:
+    """
+    Run test functions concurrently, then the ordering-sensitive ones in sequence
+
+    Args:
+        tests: (name, function) pairs; each function takes no arguments
+        run_last: Names of tests that must run after all others, in list order
+        max_workers: Number of worker threads (or processes)
+        processes: Run each test in its own fresh worker process, for tests that
+            share process-wide state; return values must be picklable
+
+    Returns:
+        Dictionary of test name to return value (None if it raised), in the order of tests
+    """
+    outcomes: Dict[str, Any] = {}
+    concurrent = [(name, func) for name, func in tests if name not in run_last]
+
+    real_stdout = sys.stdout
+    try:
+        # In process mode the threads only wait on their test's worker process
+        if processes:
+            run, run_args = _run_in_fresh_process, ()
+        else:
+            sys.stdout = stdout = _ThreadStdout(real_stdout)
+            run, run_args = _run_one, (stdout,)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_name = {
+                executor.submit(run, *run_args, name, func): name for name, func in concurrent
+            }
+            # Each block is printed whole as its test finishes
+            for future in as_completed(future_to_name):
+                name = future_to_name[future]
+                outcomes[name], output = future.result()
+                print(f"\n{'='*20} {name} {'='*20}")
+                print(output, end="")
+    finally:
+        sys.stdout = real_stdout
+
+    for name, func in tests:
+        if name in run_last:
+            print(f"\n{'='*20} {name} {'='*20}")
+            try:
+                outcomes[name] = func()
+            except Exception as e:
+                print(f"✗ {name} failed with exception: {e}")
+                outcomes[name] = None
+
+    return {name: outcomes[name] for name, _ in tests}
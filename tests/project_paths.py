@@ -0,0 +1,17 @@
+"""
+Project Source Paths for Tests
+Puts the FinSightAI source directories on sys.path once, resolved from this
+file rather than the working directory. Import it before any project module.
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Appended, not inserted: api/utils ships a logging.py that must not shadow the stdlib
+SOURCE_DIRS = ["", "vector-service", "data-ingest", "api/services", "api/utils"]
+
+for _name in SOURCE_DIRS:
+    _path = str(PROJECT_ROOT / _name) if _name else str(PROJECT_ROOT)
+    if _path not in sys.path:
+        sys.path.append(_path)
@@ -4,15 +4,13 @@ Quick Gemini API Test
 Test the real Gemini API integration with a simple financial question
 """
 import os
-import sys
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Add project paths
-sys.path.append('api/services')
-sys.path.append('api/utils')
+import project_paths  # noqa: F401
 
 def test_real_gemini_api():
     """Test real Gemini API with a financial question"""
@@ -25,6 +23,7 @@ def test_real_gemini_api():
         
         from google import genai
         from google.genai import types
+        from gemini_cache import preview_text
         
         # Initialize client (automatically picks up GEMINI_API_KEY)
         client = genai.Client()
@@ -34,14 +33,18 @@ def test_real_gemini_api():
             thinking_config=types.ThinkingConfig(thinking_budget=0)
         )
         
-        response = client.models.generate_content(
+        # Only a preview is shown, so stream and stop after 200 characters;
+        # replayed from disk when GEMINI_TEST_CACHE=1
+        response_text = preview_text(
+            client,
             model="gemini-2.5-flash",
             contents="What are the key factors affecting stock market performance?",
-            config=config
+            config=config,
+            max_chars=200
         )
         
         print(f"✅ Direct API Success!")
-        print(f"📝 Response: {response.text[:200]}...")
+        print(f"📝 Response: {response_text}...")
         
         # Test our LLM service
         print("\n2. Testing LLM Service Integration...")
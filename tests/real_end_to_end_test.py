@@ -8,14 +8,10 @@ import os
 import sys
 import json
 import shutil
-from pathlib import Path
 from datetime import datetime
 
-# Add the necessary paths to sys.path
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "data-ingest"))
-sys.path.insert(0, str(current_dir / "vector-service"))
+# Add the project source directories to sys.path
+import project_paths  # noqa: F401
 
 def test_real_data_ingestion():
     """Test real data ingestion from RSS feeds"""
@@ -85,11 +81,11 @@ def test_real_embeddings():
         
         print(f"Testing embeddings for {len(test_texts)} texts...")
         
-        embeddings = embedding_service_instance.encode(test_texts)
+        embeddings = embedding_service_instance.encode(test_texts, normalize=True)
         print(f"✓ Generated {len(embeddings)} embeddings")
         
         # Test similarity
-        similarity = embedding_service_instance.similarity(embeddings[0], embeddings[1])
+        similarity = embedding_service_instance.dot_similarity(embeddings[0], embeddings[1])
         print(f"✓ Similarity between first two texts: {similarity:.4f}")
         
         return embedding_service_instance
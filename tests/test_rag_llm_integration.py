@@ -2,19 +2,12 @@
 End-to-End Tests for RAG + LLM Integration
 Tests the complete pipeline from query to embeddings retrieval to LLM output
 """
-import os
-import sys
-import unittest
 import logging
 from unittest.mock import Mock, patch, MagicMock
 import json
 from datetime import datetime
 
-# Add project paths
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api', 'services'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api', 'utils'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'vector-service'))
+import pytest
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +35,13 @@ class MockVectorServiceManager:
                 'metadata': {'title': 'Fed Rate Outlook', 'source': 'economic_news', 'category': 'monetary_policy'}
             }
         ]
+        # Lower-cased texts, computed once per document rather than on every query
+        self._doc_lower = [doc['text'].lower() for doc in self.documents]
+    
+    def add_documents(self, documents):
+        """Append mock documents, keeping the lower-cased texts in step"""
+        self.documents.extend(documents)
+        self._doc_lower.extend(doc['text'].lower() for doc in documents)
     
     def search(self, query, search_type="hybrid", n_results=5, **kwargs):
         """Mock search that returns relevant documents based on keywords"""
@@ -49,18 +49,11 @@ class MockVectorServiceManager:
         from document_service import Document
         
         results = []
-        query_lower = query.lower()
+        query_words = query.lower().split()
         
-        for doc in self.documents:
-            # Simple keyword matching for mock
-            text_lower = doc['text'].lower()
-            score = 0.0
-            
-            # Calculate mock similarity score
-            query_words = query_lower.split()
-            for word in query_words:
-                if word in text_lower:
-                    score += 0.3
+        for doc, text_lower in zip(self.documents, self._doc_lower):
+            # Simple keyword matching for mock: 0.3 per query word found in the text
+            score = 0.3 * sum(word in text_lower for word in query_words)
             
             if score > 0:
                 document = Document(
@@ -81,6 +74,11 @@ class MockVectorServiceManager:
         results.sort(key=lambda x: x.score, reverse=True)
         return results[:n_results]
     
+    def search_batch(self, queries, search_type="hybrid", n_results=5, query_embeddings=None, **kwargs):
+        """Mock batched search, mirroring VectorServiceManager.search_batch"""
+        return [self.search(query, search_type=search_type, n_results=n_results, **kwargs)
+                for query in queries]
+    
     def get_system_status(self):
         """Mock system status"""
         return {
@@ -127,23 +125,39 @@ class MockLLMService:
         }
 
 
-class TestRAGLLMIntegration(unittest.TestCase):
+def _build_rag_service(mock_vector_manager):
+    """RAGService wired to the given mock vector manager and a MockLLMService"""
+    from rag_service import RAGService
+    
+    return RAGService(
+        vector_service_manager=mock_vector_manager,
+        llm_service=MockLLMService()
+    )
+
+
+@pytest.fixture
+def rag_service():
+    """Fresh RAG service over the mock services for each test"""
+    return _build_rag_service(MockVectorServiceManager())
+
+
+@pytest.fixture
+def rag_service_with_mock_data():
+    """Fresh RAG service over the mock corpus extended with create_mock_data_pipeline()"""
+    mock_vector_manager = MockVectorServiceManager()
+    mock_vector_manager.add_documents(create_mock_data_pipeline())
+    return _build_rag_service(mock_vector_manager)
+
+
+class TestRAGLLMIntegration:
     """Test cases for RAG + LLM integration"""
     
-    def setUp(self):
+    @pytest.fixture(autouse=True)
+    def _services(self, rag_service):
         """Set up test fixtures"""
-        # Create mock services
-        self.mock_vector_manager = MockVectorServiceManager()
-        self.mock_llm_service = MockLLMService()
-        
-        # Import RAG service
-        from rag_service import RAGService
-        
-        # Initialize RAG service with mocks
-        self.rag_service = RAGService(
-            vector_service_manager=self.mock_vector_manager,
-            llm_service=self.mock_llm_service
-        )
+        self.rag_service = rag_service
+        self.mock_vector_manager = rag_service.vector_service_manager
+        self.mock_llm_service = rag_service.llm_service
     
     def test_retrieval_only(self):
         """Test document retrieval without LLM generation"""
@@ -156,15 +170,15 @@ class TestRAGLLMIntegration(unittest.TestCase):
         )
         
         # Verify retrieval results
-        self.assertIsNotNone(retrieval_result)
-        self.assertEqual(retrieval_result.query, query)
-        self.assertGreater(retrieval_result.total_retrieved, 0)
-        self.assertTrue(len(retrieval_result.search_results) > 0)
+        assert retrieval_result is not None
+        assert retrieval_result.query == query
+        assert retrieval_result.total_retrieved > 0
+        assert len(retrieval_result.search_results) > 0
         
         # Check context text
         context_text = retrieval_result.get_context_text()
-        self.assertIsInstance(context_text, str)
-        self.assertGreater(len(context_text), 0)
+        assert isinstance(context_text, str)
+        assert len(context_text) > 0
         
         logger.info(f"Retrieval test passed - found {retrieval_result.total_retrieved} documents")
     
@@ -181,116 +195,109 @@ class TestRAGLLMIntegration(unittest.TestCase):
         )
         
         # Verify response structure
-        self.assertIsInstance(response, dict)
-        self.assertIn('query', response)
-        self.assertIn('insights', response)
-        self.assertIn('retrieval', response)
-        self.assertIn('generation', response)
-        self.assertIn('pipeline', response)
-        self.assertIn('sources', response)
+        assert isinstance(response, dict)
+        assert 'query' in response
+        assert 'insights' in response
+        assert 'retrieval' in response
+        assert 'generation' in response
+        assert 'pipeline' in response
+        assert 'sources' in response
         
         # Verify content
-        self.assertEqual(response['query'], query)
-        self.assertIsInstance(response['insights'], str)
-        self.assertGreater(len(response['insights']), 0)
+        assert response['query'] == query
+        assert isinstance(response['insights'], str)
+        assert len(response['insights']) > 0
         
         # Verify retrieval info
-        self.assertIn('method', response['retrieval'])
-        self.assertIn('documents_found', response['retrieval'])
-        self.assertGreater(response['retrieval']['documents_found'], 0)
+        assert 'method' in response['retrieval']
+        assert 'documents_found' in response['retrieval']
+        assert response['retrieval']['documents_found'] > 0
         
         # Verify generation info
-        self.assertIn('provider', response['generation'])
-        self.assertIn('model', response['generation'])
-        self.assertEqual(response['generation']['insight_type'], 'market_analysis')
+        assert 'provider' in response['generation']
+        assert 'model' in response['generation']
+        assert response['generation']['insight_type'] == 'market_analysis'
         
         # Verify pipeline status
-        self.assertIn('status', response['pipeline'])
-        self.assertIn(response['pipeline']['status'], ['success', 'partial_success'])
+        assert 'status' in response['pipeline']
+        assert response['pipeline']['status'] in ['success', 'partial_success']
         
         # Verify sources
-        self.assertIsInstance(response['sources'], list)
-        self.assertGreater(len(response['sources']), 0)
+        assert isinstance(response['sources'], list)
+        assert len(response['sources']) > 0
         
         logger.info(f"End-to-end test passed - generated {len(response['insights'])} character response")
     
-    def test_question_categorization(self):
+    @pytest.mark.parametrize("question, expected_type", [
+        ("What's the latest market trend?", "market_analysis"),
+        ("How should I diversify my portfolio?", "portfolio_advice"),
+        ("What are the recent news about Tesla?", "news_summary"),
+        ("Explain compound interest", "general")
+    ])
+    def test_question_categorization(self, question, expected_type):
         """Test automatic question categorization"""
-        test_cases = [
-            ("What's the latest market trend?", "market_analysis"),
-            ("How should I diversify my portfolio?", "portfolio_advice"),
-            ("What are the recent news about Tesla?", "news_summary"),
-            ("Explain compound interest", "general")
-        ]
+        response = self.rag_service.ask_question(question, k=2)
         
-        for question, expected_type in test_cases:
-            with self.subTest(question=question):
-                response = self.rag_service.ask_question(question, k=2)
-                
-                self.assertIsInstance(response, dict)
-                self.assertIn('generation', response)
-                self.assertEqual(response['generation']['insight_type'], expected_type)
-                
-                logger.info(f"Categorization test passed: '{question}' → {expected_type}")
+        assert isinstance(response, dict)
+        assert 'generation' in response
+        assert response['generation']['insight_type'] == expected_type
+        
+        logger.info(f"Categorization test passed: '{question}' → {expected_type}")
     
-    def test_retrieval_methods(self):
+    @pytest.mark.parametrize("method", ["semantic", "text", "hybrid"])
+    def test_retrieval_methods(self, method):
         """Test different retrieval methods"""
         query = "Federal Reserve interest rates"
-        methods = ["semantic", "text", "hybrid"]
-        
-        for method in methods:
-            with self.subTest(method=method):
-                response = self.rag_service.generate_insights(
-                    query=query,
-                    retrieval_method=method,
-                    k=2
-                )
-                
-                self.assertIsInstance(response, dict)
-                self.assertEqual(response['retrieval']['method'], method)
-                self.assertGreater(response['retrieval']['documents_found'], 0)
-                
-                logger.info(f"Retrieval method test passed: {method}")
+        
+        response = self.rag_service.generate_insights(
+            query=query,
+            retrieval_method=method,
+            k=2
+        )
+        
+        assert isinstance(response, dict)
+        assert response['retrieval']['method'] == method
+        assert response['retrieval']['documents_found'] > 0
+        
+        logger.info(f"Retrieval method test passed: {method}")
     
-    def test_insight_types(self):
+    @pytest.mark.parametrize("insight_type", ["general", "market_analysis", "portfolio_advice", "news_summary"])
+    def test_insight_types(self, insight_type):
         """Test different insight types"""
         query = "Tesla stock performance"
-        insight_types = ["general", "market_analysis", "portfolio_advice", "news_summary"]
-        
-        for insight_type in insight_types:
-            with self.subTest(insight_type=insight_type):
-                response = self.rag_service.generate_insights(
-                    query=query,
-                    insight_type=insight_type,
-                    k=2
-                )
-                
-                self.assertIsInstance(response, dict)
-                self.assertEqual(response['generation']['insight_type'], insight_type)
-                self.assertIsInstance(response['insights'], str)
-                
-                logger.info(f"Insight type test passed: {insight_type}")
+        
+        response = self.rag_service.generate_insights(
+            query=query,
+            insight_type=insight_type,
+            k=2
+        )
+        
+        assert isinstance(response, dict)
+        assert response['generation']['insight_type'] == insight_type
+        assert isinstance(response['insights'], str)
+        
+        logger.info(f"Insight type test passed: {insight_type}")
     
     def test_service_status(self):
         """Test service status reporting"""
         status = self.rag_service.get_service_status()
         
-        self.assertIsInstance(status, dict)
-        self.assertIn('rag_service', status)
-        self.assertIn('vector_services', status)
-        self.assertIn('llm_service', status)
-        self.assertIn('pipeline_capabilities', status)
+        assert isinstance(status, dict)
+        assert 'rag_service' in status
+        assert 'vector_services' in status
+        assert 'llm_service' in status
+        assert 'pipeline_capabilities' in status
         
         # Check RAG service status
-        self.assertEqual(status['rag_service']['status'], 'active')
-        self.assertEqual(status['rag_service']['components']['retriever'], 'active')
-        self.assertEqual(status['rag_service']['components']['llm_generator'], 'active')
+        assert status['rag_service']['status'] == 'active'
+        assert status['rag_service']['components']['retriever'] == 'active'
+        assert status['rag_service']['components']['llm_generator'] == 'active'
         
         # Check capabilities
         capabilities = status['pipeline_capabilities']
-        self.assertTrue(capabilities['end_to_end_generation'])
-        self.assertIn('general', capabilities['supported_insight_types'])
-        self.assertIn('hybrid', capabilities['supported_retrieval_methods'])
+        assert capabilities['end_to_end_generation']
+        assert 'general' in capabilities['supported_insight_types']
+        assert 'hybrid' in capabilities['supported_retrieval_methods']
         
         logger.info("Service status test passed")
     
@@ -303,9 +310,9 @@ class TestRAGLLMIntegration(unittest.TestCase):
                 k=2
             )
             
-            self.assertIsInstance(response, dict)
-            self.assertIn('error', response)
-            self.assertEqual(response['pipeline']['status'], 'error')
+            assert isinstance(response, dict)
+            assert 'error' in response
+            assert response['pipeline']['status'] == 'error'
             
             logger.info("Error handling test passed")
     
@@ -319,35 +326,32 @@ class TestRAGLLMIntegration(unittest.TestCase):
         )
         
         # Check timing information
-        self.assertIn('pipeline', response)
-        self.assertIn('total_time', response['pipeline'])
-        self.assertIsInstance(response['pipeline']['total_time'], float)
-        self.assertGreater(response['pipeline']['total_time'], 0)
+        assert 'pipeline' in response
+        assert 'total_time' in response['pipeline']
+        assert isinstance(response['pipeline']['total_time'], float)
+        assert response['pipeline']['total_time'] > 0
         
         # Check LLM metrics
         if 'tokens_used' in response['generation']:
-            self.assertIsInstance(response['generation']['tokens_used'], int)
-            self.assertGreater(response['generation']['tokens_used'], 0)
+            assert isinstance(response['generation']['tokens_used'], int)
+            assert response['generation']['tokens_used'] > 0
         
         if 'response_time' in response['generation']:
-            self.assertIsInstance(response['generation']['response_time'], float)
-            self.assertGreater(response['generation']['response_time'], 0)
+            assert isinstance(response['generation']['response_time'], float)
+            assert response['generation']['response_time'] > 0
         
         logger.info(f"Performance test passed - pipeline time: {response['pipeline']['total_time']:.3f}s")
 
 
-class TestWithoutLLMService(unittest.TestCase):
+class TestWithoutLLMService:
     """Test RAG service behavior when LLM service is not available"""
     
-    def setUp(self):
+    @pytest.fixture(autouse=True)
+    def _services(self, rag_service, monkeypatch):
         """Set up test fixtures without LLM service"""
-        from rag_service import RAGService
-        
-        self.mock_vector_manager = MockVectorServiceManager()
-        self.rag_service = RAGService(
-            vector_service_manager=self.mock_vector_manager,
-            llm_service=None  # No LLM service
-        )
+        monkeypatch.setattr(rag_service, 'llm_service', None)  # No LLM service
+        self.rag_service = rag_service
+        self.mock_vector_manager = rag_service.vector_service_manager
     
     def test_retrieval_without_llm(self):
         """Test retrieval-only functionality when LLM is not available"""
@@ -358,13 +362,13 @@ class TestWithoutLLMService(unittest.TestCase):
             k=2
         )
         
-        self.assertIsInstance(response, dict)
-        self.assertEqual(response['query'], query)
-        self.assertIn("LLM service not available", response['insights'])
-        self.assertEqual(response['pipeline']['status'], 'partial_success')
+        assert isinstance(response, dict)
+        assert response['query'] == query
+        assert "LLM service not available" in response['insights']
+        assert response['pipeline']['status'] == 'partial_success'
         
         # Should still have retrieval results
-        self.assertGreater(response['retrieval']['documents_found'], 0)
+        assert response['retrieval']['documents_found'] > 0
         
         logger.info("Retrieval without LLM test passed")
 
@@ -392,65 +396,44 @@ def create_mock_data_pipeline():
     return mock_documents
 
 
-class TestIntegrationWithMockData(unittest.TestCase):
+class TestIntegrationWithMockData:
     """Integration tests with more comprehensive mock data"""
     
-    def setUp(self):
+    @pytest.fixture(autouse=True)
+    def _services(self, rag_service_with_mock_data):
         """Set up with comprehensive mock data"""
-        from rag_service import RAGService
-        
-        # Create enhanced mock with more data
-        self.mock_vector_manager = MockVectorServiceManager()
-        self.mock_vector_manager.documents.extend(create_mock_data_pipeline())
-        
-        self.mock_llm_service = MockLLMService()
-        self.rag_service = RAGService(
-            vector_service_manager=self.mock_vector_manager,
-            llm_service=self.mock_llm_service
-        )
+        self.rag_service = rag_service_with_mock_data
+        self.mock_vector_manager = rag_service_with_mock_data.vector_service_manager
+        self.mock_llm_service = rag_service_with_mock_data.llm_service
     
-    def test_comprehensive_pipeline(self):
+    @pytest.mark.parametrize("query, expected_type", [
+        ("What are Microsoft's latest earnings?", "market_analysis"),
+        ("How should I allocate my investment portfolio?", "portfolio_advice"),
+        ("Give me technical analysis on Apple stock", "market_analysis"),
+        ("What's the latest financial news?", "news_summary")
+    ])
+    def test_comprehensive_pipeline(self, query, expected_type):
         """Test the pipeline with comprehensive mock data"""
-        test_queries = [
-            ("What are Microsoft's latest earnings?", "market_analysis"),
-            ("How should I allocate my investment portfolio?", "portfolio_advice"),
-            ("Give me technical analysis on Apple stock", "market_analysis"),
-            ("What's the latest financial news?", "news_summary")
-        ]
+        response = self.rag_service.ask_question(query, k=3)
         
-        for query, expected_type in test_queries:
-            with self.subTest(query=query):
-                response = self.rag_service.ask_question(query, k=3)
-                
-                self.assertIsInstance(response, dict)
-                self.assertIn('insights', response)
-                self.assertGreater(len(response['insights']), 0)
-                self.assertEqual(response['generation']['insight_type'], expected_type)
-                
-                # Should find relevant documents
-                self.assertGreater(response['retrieval']['documents_found'], 0)
-                
-                logger.info(f"Comprehensive test passed: '{query}' → {response['retrieval']['documents_found']} docs")
+        assert isinstance(response, dict)
+        assert 'insights' in response
+        assert len(response['insights']) > 0
+        assert response['generation']['insight_type'] == expected_type
+        
+        # Should find relevant documents
+        assert response['retrieval']['documents_found'] > 0
+        
+        logger.info(f"Comprehensive test passed: '{query}' → {response['retrieval']['documents_found']} docs")
 
 
 if __name__ == '__main__':
-    # Create test suite
-    suite = unittest.TestSuite()
-    
-    # Add test classes
-    suite.addTest(unittest.makeSuite(TestRAGLLMIntegration))
-    suite.addTest(unittest.makeSuite(TestWithoutLLMService))
-    suite.addTest(unittest.makeSuite(TestIntegrationWithMockData))
-    
-    # Run tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
+    import sys
+    import importlib.util
+    import pytest
     
-    # Print summary
-    if result.wasSuccessful():
-        print("\n✅ All RAG + LLM integration tests passed!")
-        print(f"Ran {result.testsRun} tests successfully")
-    else:
-        print(f"\n❌ {len(result.failures)} test(s) failed, {len(result.errors)} error(s)")
-        for test, error in result.failures + result.errors:
-            print(f"Failed: {test} - {error}")
+    # Every test builds its own services; spread them over worker processes when pytest-xdist is installed
+    args = [__file__, "-q"]
+    if importlib.util.find_spec("xdist") is not None:
+        args += ["-n", "auto"]
+    sys.exit(pytest.main(args))
@@ -6,28 +6,39 @@ Tests the actual Jina embedding service with the provided API key
 
 import os
 import sys
-import json
-from pathlib import Path
+import time
+import traceback
 from datetime import datetime
+from pathlib import Path
+
+import numpy as np
 
-# Add the necessary paths to sys.path
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "vector-service"))
+# Add the project source directories to sys.path
+import project_paths  # noqa: F401
+import embedding_service
+from common import get_embedding_service, write_json
+from parallel_tests import run_tests
+
+# Environment and output location, resolved once at import
+JINA_API_KEY = os.getenv("JINA_API_KEY")
+PROCESSED_DIR = Path("data/processed")
+
+def encode_to_array(service, texts):
+    """Encode texts straight into one contiguous (N, D) float32 matrix"""
+    return service.encode(texts, as_numpy=True)
 
 def test_jina_api_key():
     """Test if Jina API key is properly set"""
     print("🔑 Testing Jina API Key")
     print("=" * 50)
     
-    jina_api_key = os.getenv("JINA_API_KEY")
-    if not jina_api_key:
+    if not JINA_API_KEY:
         print("✗ JINA_API_KEY not set")
         return False
     
     print(f"✓ Jina API key is set")
-    print(f"  Key starts with: {jina_api_key[:20]}...")
-    print(f"  Key length: {len(jina_api_key)} characters")
+    print(f"  Key starts with: {JINA_API_KEY[:20]}...")
+    print(f"  Key length: {len(JINA_API_KEY)} characters")
     
     return True
 
@@ -37,10 +48,8 @@ def test_embedding_service():
     print("=" * 50)
     
     try:
-        import embedding_service
-        
         # Initialize the service
-        embedding_service_instance = embedding_service.EmbeddingService()
+        embedding_service_instance = get_embedding_service()
         print("✓ Embedding service initialized successfully")
         
         # Get model info
@@ -54,7 +63,6 @@ def test_embedding_service():
         
     except Exception as e:
         print(f"✗ Embedding service test failed: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -64,10 +72,8 @@ def test_text_encoding():
     print("=" * 50)
     
     try:
-        import embedding_service
-        
-        # Initialize service
-        embedding_service_instance = embedding_service.EmbeddingService()
+        # Reuse the shared service
+        embedding_service_instance = get_embedding_service()
         
         # Test texts
         test_texts = [
@@ -81,7 +87,7 @@ def test_text_encoding():
         print(f"Testing encoding of {len(test_texts)} financial texts...")
         
         # Encode texts
-        embeddings = embedding_service_instance.encode(test_texts)
+        embeddings = encode_to_array(embedding_service_instance, test_texts)
         print(f"✓ Successfully encoded {len(embeddings)} texts")
         
         # Display embedding details
@@ -95,7 +101,6 @@ def test_text_encoding():
         
     except Exception as e:
         print(f"✗ Text encoding test failed: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -105,10 +110,8 @@ def test_similarity_calculation():
     print("=" * 50)
     
     try:
-        import embedding_service
-        
-        # Initialize service
-        embedding_service_instance = embedding_service.EmbeddingService()
+        # Reuse the shared service
+        embedding_service_instance = get_embedding_service()
         
         # Test pairs of related and unrelated texts
         text_pairs = [
@@ -121,30 +124,27 @@ def test_similarity_calculation():
         
         print(f"Testing similarity between {len(text_pairs)} text pairs...")
         
-        similarities = []
-        for i, (text1, text2) in enumerate(text_pairs, 1):
-            # Encode both texts
-            embedding1 = embedding_service_instance.encode(text1)
-            embedding2 = embedding_service_instance.encode(text2)
-            
-            # Calculate similarity
-            similarity = embedding_service_instance.similarity(embedding1, embedding2)
-            similarities.append(similarity)
-            
+        # Encode every text of every pair in one batched request
+        matrix = encode_to_array(embedding_service_instance, [text for pair in text_pairs for text in pair])
+        
+        # Row-wise cosine similarity of every pair at once over the L2-normalized embeddings
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        similarities = np.einsum("ij,ij->i", matrix[0::2], matrix[1::2])
+        
+        for i, ((text1, text2), similarity) in enumerate(zip(text_pairs, similarities), 1):
             print(f"\n  Pair {i}:")
             print(f"    Text 1: {text1}")
             print(f"    Text 2: {text2}")
             print(f"    Similarity: {similarity:.4f}")
         
         # Calculate average similarity
-        avg_similarity = sum(similarities) / len(similarities)
+        avg_similarity = float(similarities.mean())
         print(f"\n✓ Average similarity across all pairs: {avg_similarity:.4f}")
         
-        return similarities
+        return similarities.tolist()
         
     except Exception as e:
         print(f"✗ Similarity calculation test failed: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -154,10 +154,8 @@ def test_batch_processing():
     print("=" * 50)
     
     try:
-        import embedding_service
-        
-        # Initialize service
-        embedding_service_instance = embedding_service.EmbeddingService()
+        # Reuse the shared service
+        embedding_service_instance = get_embedding_service()
         
         # Create a larger batch of texts
         batch_texts = [
@@ -168,10 +166,9 @@ def test_batch_processing():
         print(f"Testing batch encoding of {len(batch_texts)} texts...")
         
         # Time the batch processing
-        import time
         start_time = time.time()
         
-        embeddings = embedding_service_instance.encode(batch_texts)
+        embeddings = encode_to_array(embedding_service_instance, batch_texts)
         
         end_time = time.time()
         processing_time = end_time - start_time
@@ -180,20 +177,13 @@ def test_batch_processing():
         print(f"  Average time per text: {processing_time/len(embeddings):.3f} seconds")
         print(f"  Processing rate: {len(embeddings)/processing_time:.1f} texts/second")
         
-        # Verify all embeddings have the same dimension
-        dimensions = [len(emb) for emb in embeddings]
-        unique_dimensions = set(dimensions)
-        
-        if len(unique_dimensions) == 1:
-            print(f"✓ All embeddings have consistent dimension: {list(unique_dimensions)[0]}")
-        else:
-            print(f"⚠ Inconsistent embedding dimensions: {unique_dimensions}")
+        # Stacking into one matrix already rejects embeddings of differing dimension
+        print(f"✓ All embeddings have consistent dimension: {embeddings.shape[1]}")
         
         return embeddings
         
     except Exception as e:
         print(f"✗ Batch processing test failed: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -203,10 +193,8 @@ def test_financial_document_embeddings():
     print("=" * 50)
     
     try:
-        import embedding_service
-        
-        # Initialize service
-        embedding_service_instance = embedding_service.EmbeddingService()
+        # Reuse the shared service
+        embedding_service_instance = get_embedding_service()
         
         # Sample financial documents
         financial_docs = [
@@ -229,13 +217,12 @@ def test_financial_document_embeddings():
         
         print(f"Testing embeddings for {len(financial_docs)} financial documents...")
         
+        # Combine title and content, then embed all documents in one batched request
+        full_texts = [f"{doc['title']}: {doc['content']}" for doc in financial_docs]
+        embeddings = encode_to_array(embedding_service_instance, full_texts)
+        
         document_embeddings = []
-        for i, doc in enumerate(financial_docs, 1):
-            # Combine title and content
-            full_text = f"{doc['title']}: {doc['content']}"
-            
-            # Generate embedding
-            embedding = embedding_service_instance.encode(full_text)
+        for i, (doc, full_text, embedding) in enumerate(zip(financial_docs, full_texts, embeddings), 1):
             document_embeddings.append({
                 "document": doc,
                 "embedding": embedding,
@@ -248,24 +235,20 @@ def test_financial_document_embeddings():
         
         # Test similarity between documents
         print(f"\n--- Testing Document Similarities ---")
+        similarities = embedding_service.similarity_matrix(embeddings)
+        
         for i in range(len(document_embeddings)):
             for j in range(i + 1, len(document_embeddings)):
                 doc1 = document_embeddings[i]
                 doc2 = document_embeddings[j]
                 
-                similarity = embedding_service_instance.similarity(
-                    doc1["embedding"], 
-                    doc2["embedding"]
-                )
-                
                 print(f"  {doc1['document']['title']} ↔ {doc2['document']['title']}")
-                print(f"    Similarity: {similarity:.4f}")
+                print(f"    Similarity: {similarities[i, j]:.4f}")
         
         return document_embeddings
         
     except Exception as e:
         print(f"✗ Financial document embeddings test failed: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -276,12 +259,18 @@ def save_embedding_results(embeddings_data):
     
     try:
         # Create results directory
-        os.makedirs("data/processed", exist_ok=True)
+        PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+        
+        # Store the sample vectors as packed float32 (4 bytes per value, mmap-able) rather than JSON floats
+        vectors_path = None
+        if embeddings_data is not None and len(embeddings_data):
+            vectors_path = str(PROCESSED_DIR / "embedding_test_vectors.npy")
+            np.save(vectors_path, np.asarray(embeddings_data, dtype=np.float32))
         
         # Prepare results data
         results = {
             "test_timestamp": datetime.now().isoformat(),
-            "jina_api_key_set": bool(os.getenv("JINA_API_KEY")),
+            "jina_api_key_set": bool(JINA_API_KEY),
             "embedding_service": "jina-embeddings-v3",
             "embedding_dimension": 1024,
             "tests_performed": [
@@ -293,17 +282,19 @@ def save_embedding_results(embeddings_data):
                 "Financial Document Embeddings"
             ],
             "sample_embeddings": {
-                "count": len(embeddings_data) if embeddings_data else 0,
-                "dimension": 1024
+                "count": len(embeddings_data) if embeddings_data is not None else 0,
+                "dimension": 1024,
+                "vectors_file": vectors_path
             }
         }
         
         # Save to file
-        results_path = "data/processed/embedding_test_results.json"
-        with open(results_path, "w") as f:
-            json.dump(results, f, indent=2)
+        results_path = PROCESSED_DIR / "embedding_test_results.json"
+        write_json(results_path, results)
         
         print(f"✓ Embedding test results saved to {results_path}")
+        if vectors_path:
+            print(f"✓ Sample embeddings saved to {vectors_path}")
         return True
         
     except Exception as e:
@@ -318,11 +309,10 @@ def main():
     # Check environment
     print(f"Python version: {sys.version}")
     print(f"Working directory: {os.getcwd()}")
-    print(f"JINA_API_KEY set: {'Yes' if os.getenv('JINA_API_KEY') else 'No'}")
+    print(f"JINA_API_KEY set: {'Yes' if JINA_API_KEY else 'No'}")
     
     # Run tests
     tests = [
-        ("Jina API Key", test_jina_api_key),
         ("Embedding Service", test_embedding_service),
         ("Text Encoding", test_text_encoding),
         ("Similarity Calculation", test_similarity_calculation),
@@ -330,24 +320,24 @@ def main():
         ("Financial Documents", test_financial_document_embeddings),
     ]
     
-    results = {}
-    embeddings_data = None
+    print(f"\n{'='*20} Jina API Key {'='*20}")
+    results = {"Jina API Key": test_jina_api_key()}
+    skipped = set()
+    
+    if results["Jina API Key"]:
+        # Each test is independent and mostly waits on the Jina API, so run them concurrently
+        results.update(run_tests(tests))
+    else:
+        # Every remaining test needs the API; don't let each one fail on its own
+        for test_name, _ in tests:
+            print(f"⏭ {test_name} skipped (no JINA_API_KEY)")
+            results[test_name] = None
+            skipped.add(test_name)
+    embeddings_data = results["Text Encoding"]
     
-    for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
-        try:
-            if test_name == "Text Encoding":
-                embeddings_data = test_func()
-                results[test_name] = embeddings_data is not None
-            elif test_name == "Financial Documents":
-                doc_embeddings = test_func()
-                results[test_name] = doc_embeddings is not None
-            else:
-                success = test_func()
-                results[test_name] = success
-        except Exception as e:
-            print(f"✗ {test_name} failed with exception: {e}")
-            results[test_name] = False
+    # These return their embeddings, or None on failure
+    for test_name in ("Text Encoding", "Batch Processing", "Financial Documents"):
+        results[test_name] = results[test_name] is not None
     
     # Save results
     save_embedding_results(embeddings_data)
@@ -357,14 +347,15 @@ def main():
     print("📊 Test Results Summary")
     print("=" * 60)
     
-    passed = sum(1 for success in results.values() if success)
-    total = len(results)
+    # Skipped tests neither pass nor fail, so leave them out of both counts
+    passed = sum(1 for test_name, success in results.items() if success and test_name not in skipped)
+    total = len(results) - len(skipped)
     
     for test_name, success in results.items():
-        status = "✅ PASS" if success else "❌ FAIL"
+        status = "⏭ SKIP" if test_name in skipped else "✅ PASS" if success else "❌ FAIL"
         print(f"{status} {test_name}")
     
-    print(f"\nOverall: {passed}/{total} tests passed")
+    print(f"\nOverall: {passed}/{total} tests passed" + (f" ({len(skipped)} skipped)" if skipped else ""))
     
     if passed == total:
         print("🎉 All tests passed! Jina embeddings are working correctly.")
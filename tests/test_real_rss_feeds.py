@@ -6,14 +6,46 @@ Tests the actual RSS feeds to ensure they're working and can fetch real data
 
 import os
 import sys
-import json
-from pathlib import Path
+import asyncio
+import traceback
 from datetime import datetime
+from pathlib import Path
+
+# Add the project source directories to sys.path
+import project_paths  # noqa: F401
+import rss_config
+from common import get_http_session, write_json
+from parallel_tests import run_tests
 
-# Add the necessary paths to sys.path
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "data-ingest"))
+# Environment and output location, resolved once at import
+JINA_API_KEY = os.getenv("JINA_API_KEY")
+NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
+PROCESSED_DIR = Path("data/processed")
+
+def fetch_concurrently(fetch, items, **kwargs):
+    """
+    Run a blocking fetch for every item at once on worker threads
+    
+    Each fetch gets the HTTP session of the worker thread it runs on.
+    
+    Args:
+        fetch: Fetch function taking one item as its first argument and a session keyword
+        items: Items to fetch (feed URL lists, category names, ...)
+        **kwargs: Extra keyword arguments for fetch
+    
+    Returns:
+        List of (item, articles) in input order; articles is the exception if that fetch failed
+    """
+    def fetch_one(item):
+        return fetch(item, session=get_http_session(), **kwargs)
+    
+    async def run_all():
+        return await asyncio.gather(
+            *(asyncio.to_thread(fetch_one, item) for item in items),
+            return_exceptions=True
+        )
+    
+    return list(zip(items, asyncio.run(run_all())))
 
 def test_rss_configuration():
     """Test RSS configuration and display all available feeds"""
@@ -21,8 +53,6 @@ def test_rss_configuration():
     print("=" * 50)
     
     try:
-        import rss_config
-        
         # Display all feeds
         all_feeds = rss_config.get_all_feed_urls()
         print(f"Total RSS feeds configured: {len(all_feeds)}")
@@ -40,7 +70,6 @@ def test_rss_configuration():
         
     except Exception as e:
         print(f"✗ RSS configuration test failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -61,24 +90,33 @@ def test_real_rss_fetching():
         
         print(f"Testing {len(test_feeds)} RSS feeds...")
         
-        for i, feed_url in enumerate(test_feeds, 1):
+        # Fetch every feed concurrently; the network waits overlap instead of adding up
+        feed_results = fetch_concurrently(
+            fetch_news.fetch_news_from_rss, [[feed_url] for feed_url in test_feeds],
+            max_entries_per_feed=3, metadata_only=True
+        )
+        
+        for i, ([feed_url], articles) in enumerate(feed_results, 1):
             print(f"\n--- Testing Feed {i}: {feed_url} ---")
             
             try:
-                # Fetch articles from this feed
-                articles = fetch_news.fetch_news_from_rss([feed_url], max_entries_per_feed=3)
+                if isinstance(articles, Exception):
+                    raise articles
                 
                 if articles:
                     print(f"✓ Successfully fetched {len(articles)} articles")
                     
                     # Display first article details
                     if articles:
-                        first_article = articles[0]
+                        get = articles[0].get
+                        title, source, published, content = (
+                            get('title', 'N/A'), get('source', 'N/A'), get('published', 'N/A'), get('content', '')
+                        )
                         print(f"  Sample article:")
-                        print(f"    Title: {first_article.get('title', 'N/A')[:80]}...")
-                        print(f"    Source: {first_article.get('source', 'N/A')}")
-                        print(f"    Published: {first_article.get('published', 'N/A')}")
-                        print(f"    Content length: {len(first_article.get('content', ''))} characters")
+                        print(f"    Title: {title[:80]}...")
+                        print(f"    Source: {source}")
+                        print(f"    Published: {published}")
+                        print(f"    Content length: {len(content) if isinstance(content, str) else 0} characters")
                 else:
                     print("⚠ No articles fetched from this feed")
                     
@@ -90,7 +128,6 @@ def test_real_rss_fetching():
         
     except Exception as e:
         print(f"✗ RSS fetching test failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -103,8 +140,7 @@ def test_newsapi_integration():
         import fetch_news
         
         # Check if NewsAPI key is available
-        newsapi_key = os.getenv("NEWSAPI_KEY")
-        if not newsapi_key:
+        if not NEWSAPI_KEY:
             print("⚠ NEWSAPI_KEY not set, skipping NewsAPI test")
             print("  Set NEWSAPI_KEY environment variable to test NewsAPI")
             return True
@@ -114,9 +150,10 @@ def test_newsapi_integration():
         # Test with a simple query
         test_query = "stock market"
         articles = fetch_news.fetch_news_from_newsapi(
-            api_key=newsapi_key,
+            api_key=NEWSAPI_KEY,
             query=test_query,
-            page_size=3
+            page_size=3,
+            session=get_http_session()
         )
         
         if articles:
@@ -124,12 +161,15 @@ def test_newsapi_integration():
             
             # Display first article details
             if articles:
-                first_article = articles[0]
+                get = articles[0].get
+                title, source, published, content = (
+                    get('title', 'N/A'), get('source', 'N/A'), get('published', 'N/A'), get('content', '')
+                )
                 print(f"  Sample article:")
-                print(f"    Title: {first_article.get('title', 'N/A')[:80]}...")
-                print(f"    Source: {first_article.get('source', 'N/A')}")
-                print(f"    Published: {first_article.get('published', 'N/A')}")
-                print(f"    Content length: {len(first_article.get('content', ''))} characters")
+                print(f"    Title: {title[:80]}...")
+                print(f"    Source: {source}")
+                print(f"    Published: {published}")
+                print(f"    Content length: {len(content) if isinstance(content, str) else 0} characters")
         else:
             print("⚠ No articles fetched from NewsAPI")
         
@@ -137,7 +177,6 @@ def test_newsapi_integration():
         
     except Exception as e:
         print(f"✗ NewsAPI test failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -152,11 +191,16 @@ def test_category_based_fetching():
         # Test fetching by category
         test_categories = ["business", "markets", "analysis"]
         
-        for category in test_categories:
+        category_results = fetch_concurrently(
+            fetch_news.fetch_news_by_category, test_categories, max_entries_per_feed=2
+        )
+        
+        for category, articles in category_results:
             print(f"\n--- Testing {category.upper()} category ---")
             
             try:
-                articles = fetch_news.fetch_news_by_category(category, max_entries_per_feed=2)
+                if isinstance(articles, Exception):
+                    raise articles
                 
                 if articles:
                     print(f"✓ Successfully fetched {len(articles)} articles from {category} category")
@@ -176,7 +220,6 @@ def test_category_based_fetching():
         
     except Exception as e:
         print(f"✗ Category-based fetching test failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -208,11 +251,23 @@ def test_data_processing():
             print(f"  Chunk {i+1}: {chunk['text'][:50]}...")
             print(f"    Metadata: {chunk['meta']}")
         
+        # Bulk chunking must match the per-article function chunk for chunk
+        articles = [{**sample_article, 'id': f"test{i}"} for i in range(1000)]
+        expected = [
+            chunk
+            for article in articles
+            for chunk in clean_data.prepare_article_for_embeddings(article, chunk_size=50, overlap=10)
+        ]
+        bulk_chunks = clean_data.prepare_articles_for_embeddings(articles, chunk_size=50, overlap=10)
+        if bulk_chunks != expected:
+            print("✗ Bulk chunking does not match per-article chunking")
+            return False
+        print(f"✓ Bulk chunking matched {len(bulk_chunks)} chunks across {len(articles)} articles")
+        
         return True
         
     except Exception as e:
         print(f"✗ Data processing test failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -223,10 +278,9 @@ def save_test_results():
     
     try:
         # Create test results directory
-        os.makedirs("data/processed", exist_ok=True)
+        PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
         
         # Save RSS feed list
-        import rss_config
         feeds_data = {
             "test_timestamp": datetime.now().isoformat(),
             "total_feeds": len(rss_config.ALL_FEEDS),
@@ -245,9 +299,8 @@ def save_test_results():
             ]
         
         # Save to file
-        results_path = "data/processed/rss_test_results.json"
-        with open(results_path, "w") as f:
-            json.dump(feeds_data, f, indent=2)
+        results_path = PROCESSED_DIR / "rss_test_results.json"
+        write_json(results_path, feeds_data)
         
         print(f"✓ Test results saved to {results_path}")
         return True
@@ -264,8 +317,8 @@ def main():
     # Check environment
     print(f"Python version: {sys.version}")
     print(f"Working directory: {os.getcwd()}")
-    print(f"JINA_API_KEY set: {'Yes' if os.getenv('JINA_API_KEY') else 'No'}")
-    print(f"NEWSAPI_KEY set: {'Yes' if os.getenv('NEWSAPI_KEY') else 'No'}")
+    print(f"JINA_API_KEY set: {'Yes' if JINA_API_KEY else 'No'}")
+    print(f"NEWSAPI_KEY set: {'Yes' if NEWSAPI_KEY else 'No'}")
     
     # Run tests
     tests = [
@@ -277,16 +330,8 @@ def main():
         ("Save Results", save_test_results),
     ]
     
-    results = {}
-    
-    for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
-        try:
-            success = test_func()
-            results[test_name] = success
-        except Exception as e:
-            print(f"✗ {test_name} failed with exception: {e}")
-            results[test_name] = False
+    # The tests are independent network calls, so run them concurrently; save once they are done
+    results = run_tests(tests, run_last=["Save Results"])
     
     # Summary
     print("\n" + "=" * 60)
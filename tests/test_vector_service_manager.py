@@ -6,33 +6,78 @@ Tests the vector service manager functionality independently
 
 import os
 import sys
-import json
+import math
 import shutil
-from pathlib import Path
+import tempfile
+from collections import Counter
 from datetime import datetime
+from typing import Any, Dict, List
 
-# Add the necessary paths to sys.path
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "vector-service"))
+# Add the project source directories to sys.path
+import project_paths  # noqa: F401
+from common import write_json
 
-def test_vector_service_manager():
-    """Test the vector service manager with real data"""
+def generate_synthetic_docs(n: int, source: str = 'batch_test') -> List[Dict[str, Any]]:
+    """
+    Build n numbered synthetic news documents for bulk ingestion tests
+    
+    Args:
+        n: Number of documents
+        source: Metadata source tag
+    
+    Returns:
+        Documents in the form accepted by add_documents()
+    """
+    return [
+        {
+            'text': f'Financial news article {i} about market trends and investment strategies.',
+            'metadata': {'category': 'news', 'article_id': i, 'source': source}
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def test_vector_service_manager(backend: str = "chroma", real_embeddings: bool = False):
+    """Test the vector service manager, with fake embeddings unless real_embeddings is set"""
     print("🎛️ Testing Vector Service Manager (Standalone)")
     print("=" * 60)
     
+    # One timestamp per run keeps document metadata identical across all test documents
+    run_started = datetime.now()
+    ts = run_started.isoformat()
+    
+    # Use a unique scratch directory, in RAM-backed /dev/shm where available so
+    # document storage never touches disk (the Chroma client itself is in-memory)
+    test_dir = tempfile.mkdtemp(prefix="standalone_vector_test_",
+                                dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    
     try:
         import vector_service_manager
         
-        # Use a unique directory for this test
-        test_dir = "./standalone_vector_test"
-        if os.path.exists(test_dir):
-            shutil.rmtree(test_dir)
+        # Deterministic offline embeddings by default; real Jina calls only when asked for
+        embedding_service = None
+        if not real_embeddings:
+            from fake_embeddings import FakeEmbeddingService
+            embedding_service = FakeEmbeddingService(seed=42)
         
         # Initialize manager
         print("Initializing vector service manager...")
-        manager = vector_service_manager.create_vector_service_manager(base_dir=test_dir)
-        print("✓ Vector service manager initialized")
+        hnsw_params = {'M': 24, 'construction_ef': 128, 'search_ef': 100}
+        manager = vector_service_manager.create_vector_service_manager(
+            base_dir=test_dir,
+            quantize_embeddings=True,
+            hnsw=hnsw_params,
+            backend=backend,
+            embedding_service=embedding_service
+        )
+        print(f"✓ Vector service manager initialized (search backend: {backend})")
+        
+        # Tuned HNSW parameters must reach the new collection
+        collection_metadata = manager.chroma_service.collection.metadata or {}
+        for key, value in hnsw_params.items():
+            assert collection_metadata.get(f"hnsw:{key}") == value, \
+                f"HNSW {key} not applied: {collection_metadata}"
+        print(f"✓ HNSW parameters applied: {hnsw_params}")
         
         # Get system status
         print("\nGetting system status...")
@@ -47,59 +92,123 @@ def test_vector_service_manager():
         test_docs = [
             {
                 'text': 'The stock market showed strong performance today with major indices up 2%.',
-                'metadata': {'category': 'markets', 'source': 'standalone_test', 'timestamp': datetime.now().isoformat()}
+                'metadata': {'category': 'markets', 'source': 'standalone_test', 'timestamp': ts}
             },
             {
                 'text': 'Technology stocks led the gains, with AI companies showing particular strength.',
-                'metadata': {'category': 'technology', 'source': 'standalone_test', 'timestamp': datetime.now().isoformat()}
+                'metadata': {'category': 'technology', 'source': 'standalone_test', 'timestamp': ts}
             },
             {
                 'text': 'Federal Reserve policy affects market sentiment and trading patterns.',
-                'metadata': {'category': 'policy', 'source': 'standalone_test', 'timestamp': datetime.now().isoformat()}
+                'metadata': {'category': 'policy', 'source': 'standalone_test', 'timestamp': ts}
             }
         ]
         
-        doc_ids = manager.add_documents(test_docs, generate_embeddings=True, add_to_vector_db=True)
+        # Every text should reach the embedding model exactly once: add_documents embeds
+        # the batch in one pass, repeated encodes are served from the embedding cache,
+        # and a text repeated within one batch is embedded once
+        import requests
+        from unittest import mock
+        
+        doc_texts = [doc['text'] for doc in test_docs]
+        repeated_text = 'Bond yields rose as investors priced in fewer rate cuts.'
+        service = manager.embedding_service
+        with mock.patch.object(requests, 'post', wraps=requests.post) as jina_post, \
+                mock.patch.object(service, '_embed_texts', wraps=service._embed_texts) as embed_model:
+            doc_ids = manager.add_documents(test_docs, generate_embeddings=True, add_to_vector_db=True)
+            service.encode(doc_texts)
+            service.encode(doc_texts)
+            repeated = service.encode([repeated_text, repeated_text])
+        
+        assert repeated[0] == repeated[1], "Repeated texts should get the same embedding"
+        model_texts = Counter(text for call in embed_model.call_args_list for text in call.args[0])
+        assert model_texts == Counter(doc_texts + [repeated_text]), \
+            f"Expected one model call per unique text, got {dict(model_texts)}"
+        
+        # The real Jina path must also batch the texts into as few HTTP requests as possible
+        if real_embeddings:
+            embedding_batch_size = 32  # EmbeddingService.encode default
+            # plus one request for the repeated-text batch
+            expected_calls = math.ceil(len(test_docs) / embedding_batch_size) + 1
+            assert jina_post.call_count == expected_calls, \
+                f"Expected {expected_calls} embedding API call(s), got {jina_post.call_count}"
         print(f"✓ Added {len(doc_ids)} documents through manager")
+        print(f"  Embedding model calls: {embed_model.call_count}, API calls: {jina_post.call_count}")
+        
+        # Stored embeddings are int8 codes with a per-vector scale
+        stored_doc = manager.get_document(doc_ids[0])
+        assert 'emb_scale' in stored_doc.metadata, "Expected int8-quantized embeddings"
+        assert len(manager.get_document_embedding(doc_ids[0])) == len(stored_doc.embedding)
+        print(f"✓ Embeddings stored as int8 codes (scale {stored_doc.metadata['emb_scale']:.5f})")
         print(f"  Document IDs: {doc_ids[:3]}...")
         
         # Test search
         print("\nTesting search functionality...")
+        # The fake embeddings only match a query to a document with the same normalized
+        # text, so one query restates a stored document with different case and spacing
+        matching_query = "technology stocks led the gains,  with AI companies showing particular STRENGTH."
         search_queries = [
             "stock market performance",
-            "technology companies",
+            matching_query,
             "Federal Reserve policy"
         ]
         
-        for query in search_queries:
+        # Embed every query once, then run each search type as one batch
+        query_embeddings = manager.embedding_service.encode(search_queries)
+        semantic_per_query = manager.search_batch(
+            search_queries, search_type="semantic", n_results=3, query_embeddings=query_embeddings
+        )
+        hybrid_per_query = manager.search_batch(
+            search_queries, search_type="hybrid", n_results=3, query_embeddings=query_embeddings
+        )
+        
+        for query, semantic_results, hybrid_results in zip(search_queries, semantic_per_query, hybrid_per_query):
             print(f"\n--- Search: '{query}' ---")
-            try:
-                # Test semantic search
-                semantic_results = manager.search(query, search_type="semantic", n_results=3)
-                print(f"  Semantic search returned {len(semantic_results)} results")
-                
-                # Test hybrid search
-                hybrid_results = manager.search(query, search_type="hybrid", n_results=3)
-                print(f"  Hybrid search returned {len(hybrid_results)} results")
-                
-                # Show top result
-                if semantic_results:
-                    top_result = semantic_results[0]
-                    print(f"  Top result: {top_result.get('text', '')[:60]}...")
-                    print(f"  Score: {top_result.get('score', 'N/A')}")
-                
-            except Exception as e:
-                print(f"  ⚠ Search error for '{query}': {e}")
+            print(f"  Semantic search returned {len(semantic_results)} results")
+            print(f"  Hybrid search returned {len(hybrid_results)} results")
+            
+            # Show top result
+            if semantic_results:
+                top_result = semantic_results[0]
+                print(f"  Top result: {top_result.document.text[:60]}...")
+                print(f"  Score: {top_result.score}")
+        
+        matched = semantic_per_query[search_queries.index(matching_query)]
+        assert matched, "Expected semantic results for a query matching a stored document"
+        assert matched[0].document.document_id == doc_ids[1], \
+            f"Expected top result {doc_ids[1]}, got {matched[0].document.document_id}"
+        print(f"\n✓ Matching query returned {len(matched)} semantic result(s) with the expected top document")
+        
+        # Repeating a query should reuse its cached embedding instead of calling the API
+        print("\nTesting query embedding cache...")
+        # Lowercased so it is not already cached from add_documents, yet still matches a document
+        repeat_query = test_docs[2]['text'].lower()
+        hits_before = manager.embedding_service.cache_hits
+        first = manager.search(repeat_query, search_type="semantic", n_results=3)
+        second = manager.search(repeat_query, search_type="semantic", n_results=3)
+        cache_hits = manager.embedding_service.cache_hits - hits_before
+        assert cache_hits == 1, f"Expected 1 embedding cache hit, got {cache_hits}"
+        assert first and [r.document.document_id for r in second] == [r.document.document_id for r in first], \
+            "Expected the repeated query to return the same non-empty results"
+        print(f"✓ Repeated query served from embedding cache")
+        
+        # Near-identical queries should be answered from the query cache without ChromaDB
+        print("\nTesting query similarity cache...")
+        manager.enable_query_cache(similarity_threshold=0.97)
+        cached_query = test_docs[0]['text']
+        uncached = manager.search(cached_query, search_type="semantic", n_results=3)
+        cached = manager.search(cached_query.upper(), search_type="semantic", n_results=3)
+        cache_stats = manager.query_cache.get_stats()
+        assert uncached and uncached[0].document.document_id == doc_ids[0], \
+            f"Expected {doc_ids[0]} as the top semantic result, got {uncached}"
+        assert cache_stats['hits'] == 1 and cache_stats['misses'] == 1, \
+            f"Expected one query cache miss then one hit, got {cache_stats}"
+        assert [r.document.document_id for r in cached] == [r.document.document_id for r in uncached]
+        print(f"✓ Query cache stats: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
         
         # Test batch operations
         print("\nTesting batch operations...")
-        batch_docs = [
-            {
-                'text': f'Financial news article {i} about market trends and investment strategies.',
-                'metadata': {'category': 'news', 'article_id': i, 'source': 'batch_test'}
-            }
-            for i in range(1, 6)  # Add 5 more documents
-        ]
+        batch_docs = generate_synthetic_docs(5)  # Add 5 more documents
         
         batch_ids = manager.add_documents(batch_docs, generate_embeddings=True, add_to_vector_db=True)
         print(f"✓ Added {len(batch_ids)} documents in batch operation")
@@ -123,7 +232,7 @@ def test_vector_service_manager():
         os.makedirs("data/processed", exist_ok=True)
         
         results = {
-            "test_timestamp": datetime.now().isoformat(),
+            "test_timestamp": run_started,
             "test_type": "standalone_vector_service_manager",
             "documents_added": len(doc_ids) + len(batch_ids),
             "final_document_count": final_status['services']['chroma']['document_count'],
@@ -134,30 +243,25 @@ def test_vector_service_manager():
         }
         
         results_path = "data/processed/vector_manager_test_results.json"
-        with open(results_path, "w") as f:
-            json.dump(results, f, indent=2)
+        write_json(results_path, results)
         
         print(f"✓ Test results saved to {results_path}")
-        
-        return manager
-        
-    except Exception as e:
-        print(f"✗ Vector service manager test failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
     
     finally:
         # Cleanup
-        if os.path.exists(test_dir):
-            try:
-                shutil.rmtree(test_dir)
-                print(f"✓ Cleaned up test directory: {test_dir}")
-            except Exception as e:
-                print(f"⚠ Cleanup warning: {e}")
+        shutil.rmtree(test_dir, ignore_errors=True)
+        print(f"✓ Cleaned up test directory: {test_dir}")
 
 def main():
     """Main test function"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Vector Service Manager standalone test')
+    parser.add_argument('--backend', choices=['chroma', 'faiss_ivfpq'], default='chroma',
+                        help='Semantic search backend to test')
+    parser.add_argument('--embeddings', choices=['fake', 'jina'], default='fake',
+                        help='Embedding service: offline fake embeddings or the real Jina API')
+    args = parser.parse_args()
+    
     print("🚀 FinSightAI Vector Service Manager Standalone Test")
     print("=" * 70)
     
@@ -166,42 +270,45 @@ def main():
     print(f"Working directory: {os.getcwd()}")
     print(f"JINA_API_KEY set: {'Yes' if os.getenv('JINA_API_KEY') else 'No'}")
     
-    if not os.getenv('JINA_API_KEY'):
-        print("❌ JINA_API_KEY not set. This test requires a valid Jina API key.")
+    real_embeddings = args.embeddings == 'jina'
+    if real_embeddings and not os.getenv('JINA_API_KEY'):
+        print("❌ JINA_API_KEY not set. --embeddings jina requires a valid Jina API key.")
         return False
     
     # Run test
     print(f"\n{'='*20} Vector Service Manager Test {'='*20}")
     
+    # The test raises on the first failed check, so pytest sees failures too
     try:
-        manager = test_vector_service_manager()
-        success = manager is not None
-        
-        # Summary
-        print("\n" + "=" * 70)
-        print("📊 Test Results Summary")
-        print("=" * 70)
-        
-        if success:
-            print("✅ PASS Vector Service Manager Test")
-            print("\n🎉 Vector Service Manager test passed!")
-            print("\nFunctionality tested:")
-            print("1. ✅ Manager initialization with real Jina embeddings")
-            print("2. ✅ Document addition with embedding generation")
-            print("3. ✅ Semantic and hybrid search capabilities") 
-            print("4. ✅ Batch document operations")
-            print("5. ✅ System status monitoring")
-            print("6. ✅ Document retrieval and management")
-            print("\nThe Vector Service Manager is production-ready!")
-        else:
-            print("❌ FAIL Vector Service Manager Test")
-            print("⚠ Vector Service Manager test failed. Check the output above for details.")
-        
-        return success
-        
+        test_vector_service_manager(backend=args.backend, real_embeddings=real_embeddings)
+        success = True
     except Exception as e:
-        print(f"✗ Test failed with exception: {e}")
-        return False
+        print(f"✗ Vector service manager test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        success = False
+    
+    # Summary
+    print("\n" + "=" * 70)
+    print("📊 Test Results Summary")
+    print("=" * 70)
+    
+    if success:
+        print("✅ PASS Vector Service Manager Test")
+        print("\n🎉 Vector Service Manager test passed!")
+        print("\nFunctionality tested:")
+        print(f"1. ✅ Manager initialization with {'real Jina' if real_embeddings else 'fake'} embeddings")
+        print("2. ✅ Document addition with embedding generation")
+        print("3. ✅ Semantic and hybrid search capabilities") 
+        print("4. ✅ Batch document operations")
+        print("5. ✅ System status monitoring")
+        print("6. ✅ Document retrieval and management")
+        print("\nThe Vector Service Manager is production-ready!")
+    else:
+        print("❌ FAIL Vector Service Manager Test")
+        print("⚠ Vector Service Manager test failed. Check the output above for details.")
+    
+    return success
 
 if __name__ == "__main__":
     success = main()
@@ -8,9 +8,13 @@ import os
 from pathlib import Path
 import json
 import time
+import tempfile
 
-# Add the parent directory to the path so we can import from vector-service
-sys.path.insert(0, str(Path(__file__).parent))
+# Add the project source directories (and the shared test helpers) to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import project_paths  # noqa: F401
+from common import get_embedding_service
+from parallel_tests import run_tests
 
 def test_embedding_service():
     """Test the embedding service"""
@@ -19,10 +23,10 @@ def test_embedding_service():
     print("=" * 60)
     
     try:
-        from embedding_service import get_default_embedding_service
+        from embedding_service import similarity_matrix
         
         # Initialize service
-        service = get_default_embedding_service()
+        service = get_embedding_service()
         print(f"✅ Embedding service initialized")
         
         # Get model info
@@ -38,18 +42,17 @@ def test_embedding_service():
         ]
         
         print(f"\n🔄 Testing text encoding...")
-        start_time = time.time()
-        embeddings = service.encode(test_texts)
-        end_time = time.time()
+        start_ns = time.perf_counter_ns()
+        embeddings = service.encode(test_texts, normalize=True, as_numpy=True)
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
         
-        print(f"✅ Encoded {len(embeddings)} texts in {end_time - start_time:.2f}s")
-        print(f"📊 Embedding shape: {len(embeddings)} x {len(embeddings[0])}")
+        print(f"✅ Encoded {len(embeddings)} texts in {elapsed:.3f}s")
+        print(f"📊 Embedding shape: {embeddings.shape[0]} x {embeddings.shape[1]}")
         
         # Test similarity
         print(f"\n🔍 Testing similarity calculation...")
-        sim1 = service.similarity(embeddings[0], embeddings[1])
-        sim2 = service.similarity(embeddings[0], embeddings[2])
-        sim3 = service.similarity(embeddings[1], embeddings[2])
+        similarities = similarity_matrix(embeddings, normalized=True)
+        sim1, sim2, sim3 = similarities[0, 1], similarities[0, 2], similarities[1, 2]
         
         print(f"📊 Similarity scores:")
         print(f"   Finance vs Markets: {sim1:.4f}")
@@ -70,7 +73,7 @@ def test_jina_embeddings():
     print("=" * 60)
     
     try:
-        from embedding_service import get_jina_embedding_service
+        from embedding_service import get_jina_embedding_service, similarity_matrix
         
         # Check if Jina API key is available
         jina_api_key = os.getenv("JINA_API_KEY")
@@ -97,20 +100,20 @@ def test_jina_embeddings():
         ]
         
         print(f"\n🔄 Testing multilingual text encoding...")
-        start_time = time.time()
-        embeddings = service.encode(test_texts)
-        end_time = time.time()
+        start_ns = time.perf_counter_ns()
+        embeddings = service.encode(test_texts, normalize=True, as_numpy=True)
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
         
-        print(f"✅ Encoded {len(embeddings)} multilingual texts in {end_time - start_time:.2f}s")
-        print(f"📊 Embedding shape: {len(embeddings)} x {len(embeddings[0])}")
+        print(f"✅ Encoded {len(embeddings)} multilingual texts in {elapsed:.3f}s")
+        print(f"📊 Embedding shape: {embeddings.shape[0]} x {embeddings.shape[1]}")
         
         # Test cross-language similarity
         print(f"\n🔍 Testing cross-language similarity...")
-        english_embedding = embeddings[0]
         languages = ["English", "Spanish", "German", "Chinese", "Japanese"]
         
-        for i, (lang, embedding) in enumerate(zip(languages[1:], embeddings[1:])):
-            similarity = service.similarity(english_embedding, embedding)
+        english_similarities = similarity_matrix(embeddings, normalized=True)[0, 1:]
+        
+        for lang, similarity in zip(languages[1:], english_similarities):
             print(f"   English ↔ {lang}: {similarity:.4f}")
         
         return True
@@ -129,54 +132,55 @@ def test_chroma_service():
     try:
         from chroma_service import create_chroma_service
         
-        # Initialize service
-        service = create_chroma_service(persist_directory="./test_chroma_db")
-        print(f"✅ ChromaDB service initialized")
-        
-        # Test adding documents
-        test_docs = [
-            {
-                'id': 'test_doc_1',
-                'text': 'This is a test document about finance and investments.',
-                'metadata': {'category': 'finance', 'source': 'test', 'tags': ['finance', 'investments']}
-            },
-            {
-                'id': 'test_doc_2',
-                'text': 'Another test document about stock market analysis.',
-                'metadata': {'category': 'markets', 'source': 'test', 'tags': ['stocks', 'analysis']}
-            },
-            {
-                'id': 'test_doc_3',
-                'text': 'A third document about cryptocurrency trading strategies.',
-                'metadata': {'category': 'crypto', 'source': 'test', 'tags': ['crypto', 'trading']}
-            }
-        ]
-        
-        print(f"\n📝 Testing document addition...")
-        doc_ids = service.add_documents(test_docs)
-        print(f"✅ Added {len(doc_ids)} documents")
-        
-        # Test search
-        print(f"\n🔍 Testing search functionality...")
-        results = service.search("finance", n_results=5)
-        print(f"✅ Search returned {len(results['ids'][0])} results")
-        
-        # Test metadata filtering
-        print(f"\n🔍 Testing metadata filtering...")
-        filtered_results = service.search(
-            "trading",
-            n_results=5,
-            where={'category': 'crypto'}
-        )
-        print(f"✅ Filtered search returned {len(filtered_results['ids'][0])} results")
-        
-        # Get collection info
-        info = service.get_collection_info()
-        print(f"📊 Collection info: {info['document_count']} documents")
-        
-        # Cleanup
-        service.delete_collection()
-        print(f"🧹 Cleaned up test collection")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Initialize service
+            service = create_chroma_service(persist_directory=tmp_dir)
+            print(f"✅ ChromaDB service initialized")
+            
+            # Test adding documents
+            test_docs = [
+                {
+                    'id': 'test_doc_1',
+                    'text': 'This is a test document about finance and investments.',
+                    'metadata': {'category': 'finance', 'source': 'test', 'tags': ['finance', 'investments']}
+                },
+                {
+                    'id': 'test_doc_2',
+                    'text': 'Another test document about stock market analysis.',
+                    'metadata': {'category': 'markets', 'source': 'test', 'tags': ['stocks', 'analysis']}
+                },
+                {
+                    'id': 'test_doc_3',
+                    'text': 'A third document about cryptocurrency trading strategies.',
+                    'metadata': {'category': 'crypto', 'source': 'test', 'tags': ['crypto', 'trading']}
+                }
+            ]
+            
+            print(f"\n📝 Testing document addition...")
+            doc_ids = service.add_documents(test_docs)
+            print(f"✅ Added {len(doc_ids)} documents")
+            
+            # Test search
+            print(f"\n🔍 Testing search functionality...")
+            results = service.search("finance", n_results=5)
+            print(f"✅ Search returned {len(results['ids'][0])} results")
+            
+            # Test metadata filtering
+            print(f"\n🔍 Testing metadata filtering...")
+            filtered_results = service.search(
+                "trading",
+                n_results=5,
+                where={'category': 'crypto'}
+            )
+            print(f"✅ Filtered search returned {len(filtered_results['ids'][0])} results")
+            
+            # Get collection info
+            info = service.get_collection_info()
+            print(f"📊 Collection info: {info['document_count']} documents")
+            
+            # Cleanup
+            service.delete_collection()
+            print(f"🧹 Cleaned up test collection")
         
         return True
         
@@ -194,66 +198,54 @@ def test_document_service():
     try:
         from document_service import create_document_service
         
-        # Initialize service
-        service = create_document_service(storage_dir="./test_documents")
-        print(f"✅ Document service initialized")
-        
-        # Test adding documents
-        test_docs = [
-            {
-                'text': 'This is a test document about finance and investments.',
-                'metadata': {'category': 'finance', 'source': 'test', 'tags': ['finance', 'investments']}
-            },
-            {
-                'text': 'Another test document about stock market analysis.',
-                'metadata': {'category': 'markets', 'source': 'test', 'tags': ['stocks', 'analysis']}
-            },
-            {
-                'text': 'A third document about cryptocurrency trading strategies.',
-                'metadata': {'category': 'crypto', 'source': 'test', 'tags': ['crypto', 'trading']}
-            }
-        ]
-        
-        print(f"\n📝 Testing document addition...")
-        added_docs = []
-        for doc_data in test_docs:
-            doc = service.add_document(
-                text=doc_data['text'],
-                metadata=doc_data['metadata']
-            )
-            added_docs.append(doc)
-            print(f"   ✅ Added document: {doc.document_id}")
-        
-        # Test search
-        print(f"\n🔍 Testing text search...")
-        results = service.search_documents(query="finance")
-        print(f"✅ Text search returned {len(results)} results")
-        
-        # Test metadata filtering
-        print(f"\n🔍 Testing metadata filtering...")
-        finance_docs = service.get_documents_by_category('finance')
-        print(f"✅ Category filter returned {len(finance_docs)} finance documents")
-        
-        # Test metadata summary
-        print(f"\n📊 Testing metadata summary...")
-        summary = service.get_metadata_summary()
-        print(f"✅ Summary: {summary['total_documents']} total documents")
-        print(f"   Categories: {list(summary['categories'].keys())}")
-        print(f"   Sources: {list(summary['sources'].keys())}")
-        
-        # Test export/import
-        print(f"\n📤 Testing export/import...")
-        export_path = "./test_documents_export.json"
-        export_success = service.export_documents(export_path)
-        print(f"✅ Export: {export_success}")
-        
-        # Cleanup
-        import shutil
-        if Path("./test_documents").exists():
-            shutil.rmtree("./test_documents")
-        if Path(export_path).exists():
-            os.remove(export_path)
-        print(f"🧹 Cleaned up test files")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Initialize service
+            service = create_document_service(storage_dir=tmp_dir)
+            print(f"✅ Document service initialized")
+            
+            # Test adding documents
+            test_docs = [
+                {
+                    'text': 'This is a test document about finance and investments.',
+                    'metadata': {'category': 'finance', 'source': 'test', 'tags': ['finance', 'investments']}
+                },
+                {
+                    'text': 'Another test document about stock market analysis.',
+                    'metadata': {'category': 'markets', 'source': 'test', 'tags': ['stocks', 'analysis']}
+                },
+                {
+                    'text': 'A third document about cryptocurrency trading strategies.',
+                    'metadata': {'category': 'crypto', 'source': 'test', 'tags': ['crypto', 'trading']}
+                }
+            ]
+            
+            print(f"\n📝 Testing document addition...")
+            added_docs = service.add_documents(test_docs)
+            for doc in added_docs:
+                print(f"   ✅ Added document: {doc.document_id}")
+            
+            # Test search
+            print(f"\n🔍 Testing text search...")
+            results = service.search_documents(query="finance")
+            print(f"✅ Text search returned {len(results)} results")
+            
+            # Test metadata filtering
+            print(f"\n🔍 Testing metadata filtering...")
+            finance_docs = service.get_documents_by_category('finance')
+            print(f"✅ Category filter returned {len(finance_docs)} finance documents")
+            
+            # Test metadata summary
+            print(f"\n📊 Testing metadata summary...")
+            summary = service.get_metadata_summary()
+            print(f"✅ Summary: {summary['total_documents']} total documents")
+            print(f"   Categories: {list(summary['categories'].keys())}")
+            print(f"   Sources: {list(summary['sources'].keys())}")
+            
+            # Test export/import
+            print(f"\n📤 Testing export/import...")
+            export_path = os.path.join(tmp_dir, "documents_export.json")
+            export_success = service.export_documents(export_path)
+            print(f"✅ Export: {export_success}")
         
         return True
         
@@ -269,86 +261,79 @@ def test_search_service():
     print("=" * 60)
     
     try:
-        from embedding_service import get_default_embedding_service
-        from chroma_service import create_chroma_service
+        from chroma_service import JinaEmbeddingFunction, create_chroma_service
         from document_service import create_document_service
         from search_service import create_search_service
         
-        # Initialize all services
-        print(f"🔄 Initializing services...")
-        embedding_service = get_default_embedding_service()
-        chroma_service = create_chroma_service(persist_directory="./test_search_chroma")
-        document_service = create_document_service(storage_dir="./test_search_docs")
-        
-        search_service = create_search_service(
-            embedding_service=embedding_service,
-            chroma_service=chroma_service,
-            document_service=document_service
-        )
-        print(f"✅ Search service initialized")
-        
-        # Add test documents
-        print(f"\n📝 Adding test documents...")
-        test_docs = [
-            {
-                'text': 'This is a comprehensive guide to personal finance and investment strategies.',
-                'metadata': {'category': 'finance', 'source': 'test', 'title': 'Finance Guide'}
-            },
-            {
-                'text': 'Advanced stock market analysis techniques for day trading and long-term investing.',
-                'metadata': {'category': 'markets', 'source': 'test', 'title': 'Market Analysis'}
-            },
-            {
-                'text': 'Cryptocurrency trading strategies and blockchain technology overview.',
-                'metadata': {'category': 'crypto', 'source': 'test', 'title': 'Crypto Trading'}
-            }
-        ]
-        
-        for doc_data in test_docs:
-            doc = document_service.add_document(
-                text=doc_data['text'],
-                metadata=doc_data['metadata']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Initialize all services
+            print(f"🔄 Initializing services...")
+            embedding_service = get_embedding_service()
+            chroma_service = create_chroma_service(
+                persist_directory=os.path.join(tmp_dir, "chroma"),
+                embedding_function=JinaEmbeddingFunction(embedding_service)
             )
+            document_service = create_document_service(storage_dir=os.path.join(tmp_dir, "documents"))
+            
+            search_service = create_search_service(
+                embedding_service=embedding_service,
+                chroma_service=chroma_service,
+                document_service=document_service
+            )
+            print(f"✅ Search service initialized")
+            
+            # Add test documents
+            print(f"\n📝 Adding test documents...")
+            test_docs = [
+                {
+                    'text': 'This is a comprehensive guide to personal finance and investment strategies.',
+                    'metadata': {'category': 'finance', 'source': 'test', 'title': 'Finance Guide'}
+                },
+                {
+                    'text': 'Advanced stock market analysis techniques for day trading and long-term investing.',
+                    'metadata': {'category': 'markets', 'source': 'test', 'title': 'Market Analysis'}
+                },
+                {
+                    'text': 'Cryptocurrency trading strategies and blockchain technology overview.',
+                    'metadata': {'category': 'crypto', 'source': 'test', 'title': 'Crypto Trading'}
+                }
+            ]
+            
+            docs = document_service.add_documents(test_docs)
+            
+            # Embed every document in one request and add them to the vector DB in one call
+            embeddings = embedding_service.encode([doc.text for doc in docs])
+            chroma_service.add_documents([doc.to_chroma_format() for doc in docs], embeddings=embeddings)
+            
+            print(f"✅ Added {len(test_docs)} test documents")
+            
+            # Test different search types
+            print(f"\n🔍 Testing search types...")
+            
+            # Semantic search
+            semantic_results = search_service.semantic_search("investment strategies", n_results=3)
+            print(f"✅ Semantic search: {len(semantic_results)} results")
+            
+            # Text search
+            text_results = search_service.text_search("trading", n_results=3)
+            print(f"✅ Text search: {len(text_results)} results")
+            
+            # Hybrid search
+            hybrid_results = search_service.hybrid_search("finance", n_results=3)
+            print(f"✅ Hybrid search: {len(hybrid_results)} results")
             
-            # Generate embedding and add to vector DB
-            embedding = embedding_service.encode(doc.text)
-            chroma_doc = doc.to_chroma_format()
-            chroma_service.add_documents([chroma_doc])
-        
-        print(f"✅ Added {len(test_docs)} test documents")
-        
-        # Test different search types
-        print(f"\n🔍 Testing search types...")
-        
-        # Semantic search
-        semantic_results = search_service.semantic_search("investment strategies", n_results=3)
-        print(f"✅ Semantic search: {len(semantic_results)} results")
-        
-        # Text search
-        text_results = search_service.text_search("trading", n_results=3)
-        print(f"✅ Text search: {len(text_results)} results")
-        
-        # Hybrid search
-        hybrid_results = search_service.hybrid_search("finance", n_results=3)
-        print(f"✅ Hybrid search: {len(hybrid_results)} results")
-        
-        # Category search
-        category_results = search_service.search_by_category("markets", query="trading", n_results=3)
-        print(f"✅ Category search: {len(category_results)} results")
-        
-        # Get search analytics
-        print(f"\n📊 Testing search analytics...")
-        analytics = search_service.get_search_analytics()
-        print(f"✅ Analytics: {analytics['total_documents']} documents")
-        
-        # Cleanup
-        chroma_service.delete_collection()
-        import shutil
-        if Path("./test_search_chroma").exists():
-            shutil.rmtree("./test_search_chroma")
-        if Path("./test_search_docs").exists():
-            shutil.rmtree("./test_search_docs")
-        print(f"🧹 Cleaned up test files")
+            # Category search
+            category_results = search_service.search_by_category("markets", query="trading", n_results=3)
+            print(f"✅ Category search: {len(category_results)} results")
+            
+            # Get search analytics
+            print(f"\n📊 Testing search analytics...")
+            analytics = search_service.get_search_analytics()
+            print(f"✅ Analytics: {analytics['total_documents']} documents")
+            
+            # Cleanup
+            chroma_service.delete_collection()
+            print(f"🧹 Cleaned up test collection")
         
         return True
         
@@ -364,61 +349,60 @@ def test_vector_service_manager():
     print("=" * 60)
     
     try:
-        from vector_service_manager import get_default_vector_service_manager
-        
-        # Initialize manager
-        print(f"🔄 Initializing vector service manager...")
-        manager = get_default_vector_service_manager(base_dir="./test_vector_manager")
-        print(f"✅ Vector service manager initialized")
-        
-        # Get system status
-        print(f"\n📊 Getting system status...")
-        status = manager.get_system_status()
-        print(f"✅ System status retrieved")
-        print(f"   Embedding model: {status['services']['embedding']['model_name']}")
-        print(f"   Vector DB: {status['services']['chroma']['document_count']} documents")
-        print(f"   Document service: {status['services']['document']['total_documents']} documents")
-        
-        # Test adding documents
-        print(f"\n📝 Testing document addition...")
-        test_docs = [
-            {
-                'text': 'This is a test document about finance and investments.',
-                'metadata': {'category': 'finance', 'source': 'test', 'tags': ['finance', 'investments']}
-            },
-            {
-                'text': 'Another test document about stock market analysis and trading strategies.',
-                'metadata': {'category': 'markets', 'source': 'test', 'tags': ['stocks', 'trading', 'analysis']}
-            }
-        ]
-        
-        doc_ids = manager.add_documents(test_docs)
-        print(f"✅ Added {len(doc_ids)} documents")
-        
-        # Test search
-        print(f"\n🔍 Testing search functionality...")
-        results = manager.search("finance", search_type="hybrid", n_results=5)
-        print(f"✅ Search returned {len(results)} results")
-        
-        # Test category search
-        print(f"\n🔍 Testing category search...")
-        category_results = manager.search_by_category("finance", n_results=3)
-        print(f"✅ Category search returned {len(category_results)} results")
-        
-        # Test system export
-        print(f"\n📤 Testing system export...")
-        export_path = "./test_system_export.json"
-        export_success = manager.export_system_data(export_path)
-        print(f"✅ System export: {export_success}")
-        
-        # Cleanup
-        manager.cleanup()
-        import shutil
-        if Path("./test_vector_manager").exists():
-            shutil.rmtree("./test_vector_manager")
-        if Path(export_path).exists():
-            os.remove(export_path)
-        print(f"🧹 Cleaned up test files")
+        from vector_service_manager import create_vector_service_manager
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Initialize manager
+            print(f"🔄 Initializing vector service manager...")
+            manager = create_vector_service_manager(
+                base_dir=tmp_dir,
+                embedding_service=get_embedding_service()
+            )
+            print(f"✅ Vector service manager initialized")
+            
+            # Get system status
+            print(f"\n📊 Getting system status...")
+            status = manager.get_system_status()
+            print(f"✅ System status retrieved")
+            print(f"   Embedding model: {status['services']['embedding']['model_name']}")
+            print(f"   Vector DB: {status['services']['chroma']['document_count']} documents")
+            print(f"   Document service: {status['services']['document']['total_documents']} documents")
+            
+            # Test adding documents
+            print(f"\n📝 Testing document addition...")
+            test_docs = [
+                {
+                    'text': 'This is a test document about finance and investments.',
+                    'metadata': {'category': 'finance', 'source': 'test', 'tags': ['finance', 'investments']}
+                },
+                {
+                    'text': 'Another test document about stock market analysis and trading strategies.',
+                    'metadata': {'category': 'markets', 'source': 'test', 'tags': ['stocks', 'trading', 'analysis']}
+                }
+            ]
+            
+            doc_ids = manager.add_documents(test_docs)
+            print(f"✅ Added {len(doc_ids)} documents")
+            
+            # Test search
+            print(f"\n🔍 Testing search functionality...")
+            results = manager.search("finance", search_type="hybrid", n_results=5)
+            print(f"✅ Search returned {len(results)} results")
+            
+            # Test category search
+            print(f"\n🔍 Testing category search...")
+            category_results = manager.search_by_category("finance", n_results=3)
+            print(f"✅ Category search returned {len(category_results)} results")
+            
+            # Test system export
+            print(f"\n📤 Testing system export...")
+            export_path = os.path.join(tmp_dir, "system_export.json")
+            export_success = manager.export_system_data(export_path)
+            print(f"✅ System export: {export_success}")
+            
+            # Cleanup
+            manager.cleanup()
+            print(f"🧹 Cleaned up vector service manager")
         
         return True
         
@@ -432,15 +416,18 @@ def main():
     print("🚀 Starting Vector Service Layer Tests")
     print("=" * 80)
     
-    test_results = []
+    tests = [
+        ("Embedding Service", test_embedding_service),
+        ("Jina Embeddings", test_jina_embeddings),
+        ("ChromaDB Service", test_chroma_service),
+        ("Document Service", test_document_service),
+        ("Search Service", test_search_service),
+        ("Vector Service Manager", test_vector_service_manager),
+    ]
     
-    # Test individual services
-    test_results.append(("Embedding Service", test_embedding_service()))
-    test_results.append(("Jina Embeddings", test_jina_embeddings()))
-    test_results.append(("ChromaDB Service", test_chroma_service()))
-    test_results.append(("Document Service", test_document_service()))
-    test_results.append(("Search Service", test_search_service()))
-    test_results.append(("Vector Service Manager", test_vector_service_manager()))
+    # Test individual services, each in its own process: every ChromaService in one
+    # process shares Chroma's in-memory client and default collection
+    test_results = list(run_tests(tests, max_workers=min(len(tests), os.cpu_count() or 1), processes=True).items())
     
     # Summary
     print("\n" + "=" * 80)
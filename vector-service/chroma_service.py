@@ -23,11 +23,25 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _to_lists(embeddings: Any) -> Any:
+    """Convert NumPy embeddings to the nested lists ChromaDB expects, in one call"""
+    return embeddings.tolist() if hasattr(embeddings, 'tolist') else embeddings
+
+
 class JinaEmbeddingFunction:
     """Custom embedding function for Jina embeddings in ChromaDB"""
     
-    def __init__(self):
-        """Initialize the Jina embedding function"""
+    def __init__(self, embedding_service: Optional[Any] = None):
+        """
+        Initialize the Jina embedding function
+        
+        Args:
+            embedding_service: Existing EmbeddingService to share (a new one is created if omitted)
+        """
+        if embedding_service is not None:
+            self.embedding_service = embedding_service
+            return
+        
         # Import here to avoid circular imports
         try:
             from embedding_service import EmbeddingService
@@ -66,7 +80,8 @@ class ChromaService:
                  persist_directory: str = "./chroma_db",
                  collection_name: str = "finsight_documents",
                  embedding_function: Optional[Any] = None,
-                 client_settings: Optional[Dict[str, Any]] = None):
+                 client_settings: Optional[Dict[str, Any]] = None,
+                 hnsw_params: Optional[Dict[str, Any]] = None):
         """
         Initialize ChromaDB service
         
@@ -75,6 +90,8 @@ class ChromaService:
             collection_name: Name of the collection to use
             embedding_function: Custom embedding function
             client_settings: Additional ChromaDB client settings
+            hnsw_params: HNSW index parameters applied when the collection is created,
+                e.g. {'M': 24, 'construction_ef': 128, 'search_ef': 100}
         """
         if not CHROMADB_AVAILABLE:
             raise ImportError("ChromaDB is not available. Please install it with: pip install chromadb")
@@ -82,6 +99,7 @@ class ChromaService:
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         self.collection_name = collection_name
+        self.hnsw_params = hnsw_params or {}
         
         # Initialize ChromaDB client
         self.client = self._initialize_client(client_settings)
@@ -141,7 +159,7 @@ class ChromaService:
                 collection = self.client.create_collection(
                     name=self.collection_name,
                     embedding_function=embedding_function,
-                    metadata={"description": "FinSightAI document collection"}
+                    metadata=self._collection_metadata()
                 )
                 logger.info(f"Created new collection: {self.collection_name}")
                 return collection
@@ -161,15 +179,29 @@ class ChromaService:
             logger.error(f"Error initializing collection: {e}")
             raise
     
+    def _collection_metadata(self) -> Dict[str, Any]:
+        """Metadata for a new collection, including HNSW index parameters"""
+        metadata = {
+            "description": "FinSightAI document collection",
+            # Embeddings are unit-normalized, so inner product equals cosine similarity
+            "hnsw:space": "ip"
+        }
+        for key, value in self.hnsw_params.items():
+            metadata[f"hnsw:{key}"] = value
+        return metadata
+    
     def add_documents(self, 
                      documents: List[Dict[str, Any]],
-                     batch_size: int = 100) -> List[str]:
+                     batch_size: int = 100,
+                     embeddings: Optional[List[List[float]]] = None) -> List[str]:
         """
         Add documents to the vector database
         
         Args:
             documents: List of document dictionaries with 'text' and 'metadata' keys
             batch_size: Number of documents to process in each batch
+            embeddings: Optional pre-computed embeddings, parallel to documents.
+                When provided the collection's embedding function is skipped.
         
         Returns:
             List of document IDs
@@ -179,15 +211,23 @@ class ChromaService:
                 logger.warning("No documents provided")
                 return []
             
+            if embeddings is not None and len(embeddings) != len(documents):
+                raise ValueError("embeddings must be parallel to documents")
+            
+            # Embeddings may arrive as a float32 matrix; ChromaDB takes lists
+            if embeddings is not None:
+                embeddings = _to_lists(embeddings)
+            
             # Prepare documents for ChromaDB
             ids = []
             texts = []
             metadatas = []
+            vectors = [] if embeddings is not None else None
+            added_at = datetime.now().isoformat()
             
-            for doc in documents:
+            for index, doc in enumerate(documents):
                 # Generate unique ID if not provided
-                doc_id = doc.get('id', str(uuid.uuid4()))
-                ids.append(doc_id)
+                doc_id = doc.get('id') or str(uuid.uuid4())
                 
                 # Extract text content
                 text = doc.get('text', '')
@@ -195,26 +235,36 @@ class ChromaService:
                     logger.warning(f"Document {doc_id} has no text content, skipping")
                     continue
                 
+                ids.append(doc_id)
                 texts.append(text)
                 
                 # Prepare metadata
                 metadata = doc.get('metadata', {}).copy()
-                metadata['added_at'] = datetime.now().isoformat()
+                metadata['added_at'] = added_at
                 metadatas.append(metadata)
+                
+                if vectors is not None:
+                    vectors.append(embeddings[index])
+            
+            # Never exceed the client's per-call limit
+            max_batch_size = self._get_max_batch_size()
+            if max_batch_size:
+                batch_size = min(batch_size, max_batch_size)
             
             # Add documents in batches
             all_ids = []
             for i in range(0, len(ids), batch_size):
                 batch_ids = ids[i:i + batch_size]
-                batch_texts = texts[i:i + batch_size]
-                batch_metadatas = metadatas[i:i + batch_size]
+                batch = {
+                    'ids': batch_ids,
+                    'documents': texts[i:i + batch_size],
+                    'metadatas': metadatas[i:i + batch_size]
+                }
+                if vectors is not None:
+                    batch['embeddings'] = vectors[i:i + batch_size]
                 
                 try:
-                    self.collection.add(
-                        ids=batch_ids,
-                        documents=batch_texts,
-                        metadatas=batch_metadatas
-                    )
+                    self.collection.add(**batch)
                     all_ids.extend(batch_ids)
                     logger.info(f"Added batch of {len(batch_ids)} documents")
                     
@@ -229,6 +279,17 @@ class ChromaService:
             logger.error(f"Error adding documents: {e}")
             raise
     
+    def _get_max_batch_size(self) -> Optional[int]:
+        """Get the client's maximum batch size, if the installed ChromaDB exposes it"""
+        try:
+            get_max_batch_size = getattr(self.client, 'get_max_batch_size', None)
+            if get_max_batch_size is not None:
+                return get_max_batch_size()
+            return getattr(self.client, 'max_batch_size', None)
+        except Exception as e:
+            logger.debug(f"Could not determine max batch size: {e}")
+            return None
+    
     def search(self, 
                query: str,
                n_results: int = 10,
@@ -278,7 +339,7 @@ class ChromaService:
         """
         try:
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[_to_lists(query_embedding)],
                 n_results=n_results,
                 where=where
             )
@@ -290,6 +351,56 @@ class ChromaService:
             logger.error(f"Error searching by embedding: {e}")
             raise
     
+    def search_by_embeddings(self, 
+                            query_embeddings: List[List[float]],
+                            n_results: int = 10,
+                            where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Search using several pre-computed embeddings in a single query
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            n_results: Number of results to return per query
+            where: Filter metadata conditions
+        
+        Returns:
+            Search results with one row per query embedding
+        """
+        try:
+            results = self.collection.query(
+                query_embeddings=[_to_lists(embedding) for embedding in query_embeddings],
+                n_results=n_results,
+                where=where
+            )
+            
+            logger.info(f"Batched embedding search ran {len(results['ids'])} queries")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error searching by embeddings: {e}")
+            raise
+    
+    def warmup(self) -> bool:
+        """
+        Run one tiny query so the HNSW index is loaded before the first real search
+        
+        Returns:
+            True if the index was warmed, False if the collection is empty or the query failed
+        """
+        try:
+            sample = self.collection.get(limit=1, include=['embeddings'])
+            embeddings = sample.get('embeddings')
+            if embeddings is None or len(embeddings) == 0:
+                return False
+            
+            self.collection.query(query_embeddings=[list(embeddings[0])], n_results=1)
+            logger.info("ChromaDB index warmed up")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Error warming up ChromaDB index: {e}")
+            return False
+    
     def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific document by ID
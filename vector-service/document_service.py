@@ -126,6 +126,9 @@ class DocumentService:
         self.documents: Dict[str, Document] = {}
         self.metadata_index: Dict[str, List[str]] = {}
         
+        # Incremented on every registry change so derived indexes can detect staleness
+        self.version = 0
+        
         # Load existing documents
         self._load_documents()
         
@@ -153,6 +156,8 @@ class DocumentService:
     
     def _save_documents(self) -> None:
         """Save documents to storage"""
+        # Every add, update, delete and import persists through here
+        self.version += 1
         try:
             registry_file = self.storage_dir / "document_registry.json"
             
@@ -232,6 +237,51 @@ class DocumentService:
             logger.error(f"Error adding document: {e}")
             raise
     
+    def add_documents(self, documents: List[Dict[str, Any]]) -> List[Document]:
+        """
+        Add several documents with a single registry write
+        
+        Args:
+            documents: List of document dictionaries with 'text' and optional 'id' and 'metadata' keys
+        
+        Returns:
+            Documents in input order; duplicate content resolves to the existing document
+        """
+        try:
+            # Hash lookup built once instead of scanning the registry for every document
+            by_hash: Dict[str, Document] = {}
+            for existing_doc in self.documents.values():
+                by_hash.setdefault(existing_doc.content_hash, existing_doc)
+            
+            added_docs = []
+            created = 0
+            for doc_data in documents:
+                text = doc_data['text']
+                content_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
+                
+                existing_doc = by_hash.get(content_hash)
+                if existing_doc is not None:
+                    logger.warning(f"Document with same content already exists: {existing_doc.document_id}")
+                    added_docs.append(existing_doc)
+                    continue
+                
+                doc = Document(text=text, document_id=doc_data.get('id'), metadata=doc_data.get('metadata'))
+                self.documents[doc.document_id] = doc
+                self._update_metadata_index(doc)
+                by_hash[content_hash] = doc
+                added_docs.append(doc)
+                created += 1
+            
+            if created:
+                self._save_documents()
+            
+            logger.info(f"Added {created} documents")
+            return added_docs
+        
+        except Exception as e:
+            logger.error(f"Error adding documents: {e}")
+            raise
+    
     def _update_metadata_index(self, doc: Document) -> None:
         """Update metadata index for a document"""
         for key, value in doc.metadata.items():
@@ -304,6 +354,41 @@ class DocumentService:
             logger.error(f"Error updating document {document_id}: {e}")
             return False
     
+    def update_documents(self, metadata_updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Merge metadata into several documents with a single registry write
+        
+        In-memory changes to the same documents (such as new embeddings) are
+        persisted by that write as well.
+        
+        Args:
+            metadata_updates: Mapping of document ID to the metadata to merge
+        
+        Returns:
+            Number of documents updated
+        """
+        try:
+            updated = 0
+            for document_id, metadata in metadata_updates.items():
+                doc = self.get_document(document_id)
+                if not doc:
+                    logger.warning(f"Document {document_id} not found")
+                    continue
+                doc.update_metadata(metadata)
+                updated += 1
+            
+            # Rebuild the index and rewrite the registry once for the whole batch
+            if updated:
+                self._rebuild_metadata_index()
+                self._save_documents()
+            
+            logger.info(f"Updated {updated} documents")
+            return updated
+        
+        except Exception as e:
+            logger.error(f"Error updating documents: {e}")
+            raise
+    
     def delete_document(self, document_id: str) -> bool:
         """
         Delete a document
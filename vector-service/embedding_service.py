@@ -3,16 +3,33 @@ Embedding Service for FinSightAI
 Supports Jina embedding model
 """
 import os
+import time
+import random
+import hashlib
 import logging
-from typing import List, Optional, Union, Dict, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union, Dict, Any, Tuple
 import numpy as np
 from pathlib import Path
 import requests
 
+# SimSIMD provides SIMD similarity kernels; fall back to NumPy without it
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Retries for Jina requests rejected with 429 or a 5xx, with exponential backoff in seconds
+JINA_MAX_RETRIES = 3
+JINA_RETRY_BACKOFF = 0.5
+
 
 class EmbeddingService:
     """
@@ -23,7 +40,10 @@ class EmbeddingService:
                  model_name: str = "jina-embeddings-v3",
                  model_type: str = "jina",
                  jina_api_key: Optional[str] = None,
-                 cache_dir: Optional[str] = None):
+                 cache_dir: Optional[str] = None,
+                 max_concurrent_batches: int = 4,
+                 embedding_cache_size: int = 1024,
+                 embedding_cache_ttl: Optional[float] = None):
         """
         Initialize the embedding service
         
@@ -32,8 +52,21 @@ class EmbeddingService:
             model_type: Type of model (fixed to 'jina')
             jina_api_key: Jina API key if using Jina embeddings
             cache_dir: Directory to cache models (not used for Jina API)
+            max_concurrent_batches: Maximum number of Jina API requests in flight at once
+            embedding_cache_size: Maximum number of embeddings kept in the LRU cache (0 disables it)
+            embedding_cache_ttl: Seconds before a cached embedding expires (None keeps it until evicted)
         """
         self.model_name = model_name
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        
+        # LRU cache of embeddings keyed by SHA-256 of the text, so repeated
+        # queries never reach the API: key -> (stored_at, embedding)
+        self.embedding_cache_size = embedding_cache_size
+        self.embedding_cache_ttl = embedding_cache_ttl
+        self._cache: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.model_type = "jina" # Force model type to jina
         self.cache_dir = cache_dir or Path.home() / ".cache" / "finsight_embeddings"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -88,17 +121,19 @@ class EmbeddingService:
     
     def encode(self, texts: Union[str, List[str]], 
                batch_size: int = 32,
-               normalize: bool = True) -> Union[List[float], List[List[float]]]:
+               normalize: bool = True,
+               as_numpy: bool = False) -> Union[List[float], List[List[float]], np.ndarray]:
         """
         Encode text(s) to embeddings
         
         Args:
             texts: Single text string or list of text strings
             batch_size: Batch size for processing multiple texts
-            normalize: Whether to normalize embeddings to unit vectors (Jina embeddings are typically normalized by default)
+            normalize: Whether to normalize embeddings to unit vectors
+            as_numpy: Return a contiguous float32 array instead of Python lists
         
         Returns:
-            Single embedding or list of embeddings
+            Single embedding or list of embeddings ((D,) or (N, D) array if as_numpy)
         """
         if isinstance(texts, str):
             texts = [texts]
@@ -107,23 +142,84 @@ class EmbeddingService:
             single_text = False
         
         try:
-            if self.model_type == "jina":
-                embeddings = self._encode_jina(texts)
-            else:
-                raise ValueError(f"Unknown model type: {self.model_type}")
+            # Serve repeated texts from the cache; only misses go to the model
+            keys = [self._cache_key(text, normalize) for text in texts]
+            embeddings = [self._cache_get(key) for key in keys]
             
-            # Convert to list if numpy array
-            if isinstance(embeddings, np.ndarray):
-                embeddings = embeddings.tolist()
+            # Group the misses by key, so a text repeated within the batch is embedded once
+            missing = {}
+            for i, embedding in enumerate(embeddings):
+                if embedding is None:
+                    missing.setdefault(keys[i], []).append(i)
             
+            if missing:
+                positions = list(missing.values())
+                computed = self._embed_texts([texts[group[0]] for group in positions], batch_size, normalize)
+                for key, group, embedding in zip(missing, positions, computed):
+                    self._cache_put(key, embedding)
+                    for i in group:
+                        embeddings[i] = embedding
+            
+            if as_numpy:
+                # np.stack copies, so callers never hold a view into the cache
+                matrix = (np.stack(embeddings) if embeddings
+                          else np.zeros((0, self.embedding_dim), dtype=np.float32))
+                return matrix[0] if single_text else matrix
+            
+            embeddings = [embedding.tolist() for embedding in embeddings]
             return embeddings[0] if single_text else embeddings
             
         except Exception as e:
             logger.error(f"Error encoding texts: {e}")
             raise
     
-    def _encode_jina(self, texts: List[str]) -> List[List[float]]:
-        """Encode texts using Jina API"""
+    def _embed_texts(self, texts: List[str], batch_size: int, normalize: bool) -> np.ndarray:
+        """Embed texts with the model, returning a float32 matrix"""
+        if self.model_type == "jina":
+            embeddings = np.asarray(self._encode_jina(texts, batch_size=batch_size), dtype=np.float32)
+        else:
+            raise ValueError(f"Unknown model type: {self.model_type}")
+        
+        # Unit-normalize so cosine similarity reduces to a dot product
+        if normalize and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms == 0, 1.0, norms)
+        
+        return embeddings
+    
+    def _cache_key(self, text: str, normalize: bool) -> str:
+        return hashlib.sha256(f"{self.model_name}:{int(normalize)}:{text}".encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        """Return a cached embedding, counting the hit or miss"""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                stored_at, embedding = entry
+                if self.embedding_cache_ttl is None or time.monotonic() - stored_at < self.embedding_cache_ttl:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return embedding
+                del self._cache[key]
+            self.cache_misses += 1
+            return None
+    
+    def _cache_put(self, key: str, embedding: np.ndarray) -> None:
+        if self.embedding_cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), embedding)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.embedding_cache_size:
+                self._cache.popitem(last=False)
+    
+    def clear_cache(self) -> None:
+        """Drop every cached embedding"""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def _encode_jina(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Encode texts using Jina API, one request per batch_size texts"""
         try:
             url = "https://api.jina.ai/v1/embeddings"
             headers = {
@@ -131,25 +227,45 @@ class EmbeddingService:
                 "Authorization": f"Bearer {self.jina_api_key}"
             }
             
-            # Process texts in batches (using a reasonable default batch size)
-            batch_size = 32  # Jina API can handle reasonable batch sizes
-            all_embeddings = []
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i + batch_size]
-                
+            def embed_batch(batch_texts: List[str]) -> List[List[float]]:
                 payload = {
                     "model": self.model_name,
                     "task": "text-matching",  # Default task for Jina v3
                     "input": batch_texts
                 }
                 
-                response = requests.post(url, headers=headers, json=payload, timeout=30)
+                # Back off only when Jina reports rate limiting or a server error
+                for attempt in range(JINA_MAX_RETRIES + 1):
+                    response = requests.post(url, headers=headers, json=payload, timeout=30)
+                    if attempt == JINA_MAX_RETRIES or (response.status_code != 429 and response.status_code < 500):
+                        break
+                    time.sleep(JINA_RETRY_BACKOFF * 2 ** attempt * (1 + random.random()))
                 response.raise_for_status()
                 
                 data = response.json()
-                batch_embeddings = [item["embedding"] for item in data["data"]]
-                all_embeddings.extend(batch_embeddings)
+                return [item["embedding"] for item in data["data"]]
+            
+            # Process texts in batches; each batch is a single API request
+            if len(texts) <= batch_size:
+                return embed_batch(texts) if texts else []
             
+            # Group texts of similar length into the same batch so each request pads less
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            sorted_texts = [texts[i] for i in order]
+            batches = [sorted_texts[i:i + batch_size] for i in range(0, len(sorted_texts), batch_size)]
+            
+            # Send batches concurrently; the pool size caps the request rate
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrent_batches, len(batches))) as executor:
+                futures = [executor.submit(embed_batch, batch_texts) for batch_texts in batches]
+                
+                # Reassemble in submission order, then undo the length sort
+                sorted_embeddings = []
+                for future in futures:
+                    sorted_embeddings.extend(future.result())
+            
+            all_embeddings = [None] * len(texts)
+            for position, i in enumerate(order):
+                all_embeddings[i] = sorted_embeddings[position]
             return all_embeddings
             
         except requests.exceptions.RequestException as e:
@@ -172,24 +288,40 @@ class EmbeddingService:
         """
         try:
             # Convert to numpy arrays
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
-            
-            # Calculate cosine similarity
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
+            vec1 = np.asarray(embedding1, dtype=np.float32)
+            vec2 = np.asarray(embedding2, dtype=np.float32)
             
-            if norm1 == 0 or norm2 == 0:
+            if not vec1.any() or not vec2.any():
                 return 0.0
             
-            similarity = dot_product / (norm1 * norm2)
+            if SIMSIMD_AVAILABLE:
+                return float(1.0 - simsimd.cosine(vec1, vec2))
+            
+            # Calculate cosine similarity
+            similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
             return float(similarity)
             
         except Exception as e:
             logger.error(f"Error calculating similarity: {e}")
             return 0.0
     
+    def dot_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+        """
+        Calculate cosine similarity between two unit-normalized embeddings
+        
+        Embeddings from encode(normalize=True) are unit vectors, so their cosine
+        similarity is the dot product; this skips the norms similarity() computes.
+        
+        Args:
+            embedding1: First unit-normalized embedding vector
+            embedding2: Second unit-normalized embedding vector
+        
+        Returns:
+            Cosine similarity score between -1 and 1
+        """
+        return float(np.dot(np.asarray(embedding1, dtype=np.float32),
+                            np.asarray(embedding2, dtype=np.float32)))
+    
     def batch_similarity(self, query_embedding: List[float], 
                          embeddings: List[List[float]]) -> List[float]:
         """
@@ -202,7 +334,32 @@ class EmbeddingService:
         Returns:
             List of similarity scores
         """
-        return [self.similarity(query_embedding, emb) for emb in embeddings]
+        if len(embeddings) == 0:
+            return []
+        
+        try:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            
+            if SIMSIMD_AVAILABLE:
+                # One kernel call scores every candidate
+                distances = np.asarray(simsimd.cdist(query[None, :], matrix, metric="cosine"))[0]
+                scores = 1.0 - distances
+            else:
+                norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+                scores = np.divide(matrix @ query, norms,
+                                   out=np.zeros(len(matrix), dtype=np.float32),
+                                   where=norms != 0)
+            
+            # Match similarity(): zero vectors score 0
+            if not query.any():
+                return [0.0] * len(matrix)
+            scores = np.where(matrix.any(axis=1), scores, 0.0)
+            return scores.astype(float).tolist()
+            
+        except Exception as e:
+            logger.error(f"Error calculating batch similarity: {e}")
+            return [self.similarity(query_embedding, emb) for emb in embeddings]
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the current embedding model"""
@@ -211,16 +368,90 @@ class EmbeddingService:
             "model_name": self.model_name,
             "embedding_dimension": self.embedding_dim,
             "cache_directory": str(self.cache_dir),
+            "embedding_cache": {
+                "entries": len(self._cache),
+                "max_entries": self.embedding_cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses
+            },
             "available_models": {
                 "jina": True
             }
         }
 
 
+def quantize_embeddings(embeddings: Union[List[List[float]], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scalar-quantize embeddings to int8 with one scale per vector
+    
+    Args:
+        embeddings: Float embeddings, one per row
+    
+    Returns:
+        Tuple of (int8 codes, float32 per-vector scales)
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    scales = np.max(np.abs(matrix), axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.round(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_embeddings(codes: Union[List[List[int]], np.ndarray],
+                          scales: Union[List[float], np.ndarray]) -> np.ndarray:
+    """
+    Reconstruct float32 embeddings from int8 codes and per-vector scales
+    
+    Args:
+        codes: Int8 codes, one vector per row
+        scales: Per-vector scales from quantize_embeddings
+    
+    Returns:
+        Float32 embedding matrix
+    """
+    return np.asarray(codes, dtype=np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
+
+
+def similarity_matrix(embeddings: Union[List[List[float]], np.ndarray],
+                      normalized: bool = False) -> np.ndarray:
+    """
+    Calculate the cosine similarity between every pair of embeddings
+    
+    Args:
+        embeddings: Embedding vectors, one per row
+        normalized: Rows are already unit vectors (encode(normalize=True)), so
+            cosine similarity is a plain dot product and no norms are computed
+    
+    Returns:
+        (N, N) float32 matrix of cosine similarities; zero vectors score 0
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if len(matrix) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    
+    if normalized:
+        return matrix @ matrix.T
+    
+    if SIMSIMD_AVAILABLE:
+        # One SIMD kernel call over every pair
+        scores = 1.0 - np.asarray(simsimd.cdist(matrix, matrix, metric="cosine"), dtype=np.float32)
+    else:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        unit = matrix / np.where(norms == 0, 1.0, norms)
+        scores = unit @ unit.T
+    
+    # Match similarity(): zero vectors score 0
+    nonzero = matrix.any(axis=1)
+    return np.where(nonzero[:, None] & nonzero[None, :], scores, 0.0).astype(np.float32)
+
+
 def create_embedding_service(model_name: str = "jina-embeddings-v3",
                            model_type: str = "jina",
                            jina_api_key: Optional[str] = None,
-                           cache_dir: Optional[str] = None) -> EmbeddingService:
+                           cache_dir: Optional[str] = None,
+                           max_concurrent_batches: int = 4,
+                           embedding_cache_size: int = 1024,
+                           embedding_cache_ttl: Optional[float] = None) -> EmbeddingService:
     """
     Factory function to create an embedding service
     
@@ -229,6 +460,9 @@ def create_embedding_service(model_name: str = "jina-embeddings-v3",
         model_type: Type of model ('jina')
         jina_api_key: Jina API key
         cache_dir: Directory to cache models
+        max_concurrent_batches: Maximum number of Jina API requests in flight at once
+        embedding_cache_size: Maximum number of embeddings kept in the LRU cache
+        embedding_cache_ttl: Seconds before a cached embedding expires
     
     Returns:
         Configured EmbeddingService instance
@@ -245,7 +479,10 @@ def create_embedding_service(model_name: str = "jina-embeddings-v3",
         model_name=model_name,
         model_type=model_type,
         jina_api_key=jina_api_key,
-        cache_dir=cache_dir
+        cache_dir=cache_dir,
+        max_concurrent_batches=max_concurrent_batches,
+        embedding_cache_size=embedding_cache_size,
+        embedding_cache_ttl=embedding_cache_ttl
     )
 
 
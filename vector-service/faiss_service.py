@@ -0,0 +1,168 @@
+"""
+FAISS Service for FinSightAI
+Optional IVF-PQ similarity search backend over the stored document embeddings
+"""
+import re
+import math
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+# Try to import FAISS
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# FAISS wants ~39 training points per k-means centroid; PQ codebooks have 256 centroids
+MIN_POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+
+class FaissService:
+    """
+    In-memory FAISS index over unit-normalized document embeddings
+    """
+
+    def __init__(self,
+                 index_spec: Optional[str] = None,
+                 use_gpu: bool = False,
+                 nprobe: int = 16,
+                 pq_subquantizers: int = 64):
+        """
+        Initialize the FAISS service
+
+        By default the index is sized to the corpus at build time: nlist is about
+        4 * sqrt(N) IVF lists, and PQ compression is only used once there are enough
+        vectors to train its codebooks (39 * 256 = 9984); smaller corpora get IVF-Flat,
+        and corpora too small for two IVF lists get an exact Flat index.
+
+        Args:
+            index_spec: Fixed faiss.index_factory description, overriding the
+                corpus-sized default (falls back to Flat if too few vectors to train it)
+            use_gpu: Move the index to the first GPU when one is available
+                (requires faiss-gpu; requirements.txt installs faiss-cpu)
+            nprobe: Number of IVF lists probed per query
+            pq_subquantizers: PQ sub-vectors per embedding for the corpus-sized index
+        """
+        if not FAISS_AVAILABLE:
+            raise ImportError("FAISS is not available. Please install it with: pip install faiss-cpu (or faiss-gpu)")
+
+        self.index_spec = index_spec
+        self.use_gpu = use_gpu
+        self.nprobe = nprobe
+        self.pq_subquantizers = pq_subquantizers
+        self.built_spec: Optional[str] = None
+        self.index = None
+        self.ids: List[str] = []
+        self._gpu_resources = None
+
+    def _min_training_size(self) -> int:
+        """Number of vectors needed to train the configured index"""
+        match = re.search(r"IVF(\d+)", self.index_spec)
+        nlist = int(match.group(1)) if match else 0
+        return MIN_POINTS_PER_CENTROID * max(nlist, PQ_CENTROIDS if "PQ" in self.index_spec else 0)
+
+    def _corpus_index_spec(self, n_vectors: int, dim: int) -> str:
+        """Index description sized to the number of vectors being indexed"""
+        nlist = min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_CENTROID)
+        if nlist < 2:
+            return "Flat"
+        use_pq = (n_vectors >= MIN_POINTS_PER_CENTROID * PQ_CENTROIDS
+                  and dim % self.pq_subquantizers == 0)
+        return f"IVF{nlist},PQ{self.pq_subquantizers}" if use_pq else f"IVF{nlist},Flat"
+
+    def build(self, ids: List[str], embeddings: np.ndarray) -> None:
+        """
+        Build the index from scratch
+
+        Args:
+            ids: Document IDs, parallel to the embedding rows
+            embeddings: (N, D) embedding matrix
+        """
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        n_vectors, dim = matrix.shape
+
+        if self.index_spec is None:
+            index_spec = self._corpus_index_spec(n_vectors, dim)
+        else:
+            # Too few vectors to train the fixed index; exact search is also faster at that size
+            index_spec = self.index_spec if n_vectors >= self._min_training_size() else "Flat"
+
+        index = faiss.index_factory(dim, index_spec, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            index.train(matrix)
+        index.add(matrix)
+
+        if index_spec != "Flat":
+            faiss.ParameterSpace().set_index_parameter(index, "nprobe", self.nprobe)
+
+        if self.use_gpu and hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0:
+            self._gpu_resources = faiss.StandardGpuResources()
+            index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+
+        self.index = index
+        self.built_spec = index_spec
+        self.ids = list(ids)
+        logger.info(f"Built FAISS {index_spec} index over {n_vectors} vectors")
+
+    def search(self,
+               query_embeddings: List[List[float]],
+               n_results: int = 10) -> Tuple[List[List[str]], List[List[float]]]:
+        """
+        Search the index with one or more query embeddings
+
+        Args:
+            query_embeddings: Query embedding vectors
+            n_results: Number of results to return per query
+
+        Returns:
+            Tuple of (IDs per query, inner-product scores per query), best first
+        """
+        if self.index is None or not self.ids:
+            return [[] for _ in query_embeddings], [[] for _ in query_embeddings]
+
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        scores, indices = self.index.search(queries, min(n_results, len(self.ids)))
+
+        batch_ids, batch_scores = [], []
+        for row_scores, row_indices in zip(scores, indices):
+            # FAISS pads missing neighbours with -1
+            hits = [(self.ids[i], float(score)) for i, score in zip(row_indices, row_scores) if i >= 0]
+            batch_ids.append([doc_id for doc_id, _ in hits])
+            batch_scores.append([score for _, score in hits])
+        return batch_ids, batch_scores
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get information about the index"""
+        return {
+            'index_spec': self.index_spec,
+            'built_spec': self.built_spec,
+            'vector_count': len(self.ids),
+            'on_gpu': self._gpu_resources is not None
+        }
+
+
+def create_faiss_service(index_spec: Optional[str] = None,
+                         use_gpu: bool = False,
+                         nprobe: int = 16,
+                         pq_subquantizers: int = 64) -> FaissService:
+    """
+    Factory function to create a FAISS service
+
+    Args:
+        index_spec: Fixed faiss.index_factory description; None sizes the index to the corpus
+        use_gpu: Move the index to the first GPU when one is available (requires faiss-gpu)
+        nprobe: Number of IVF lists probed per query
+        pq_subquantizers: PQ sub-vectors per embedding for the corpus-sized index
+
+    Returns:
+        Configured FaissService instance
+    """
+    return FaissService(index_spec=index_spec, use_gpu=use_gpu, nprobe=nprobe,
+                        pq_subquantizers=pq_subquantizers)
@@ -0,0 +1,122 @@
+"""
+Semantic Query Cache for FinSightAI
+Reuses search results for queries whose embeddings are nearly identical
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# SimSIMD provides SIMD similarity kernels; fall back to NumPy without it
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SemanticQueryCache:
+    """
+    LRU cache of search results keyed on query embedding similarity
+    """
+
+    def __init__(self, max_entries: int = 128, max_distance: float = 0.03):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached queries before LRU eviction
+            max_distance: Maximum cosine distance for a cached query to count as a hit
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[int, Tuple[Hashable, np.ndarray, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(search_type: str,
+                 n_results: int,
+                 metadata_filters: Optional[Dict[str, Any]] = None,
+                 **search_kwargs) -> Tuple[str, int, str, str]:
+        """Build the exact-match part of a cache key from every search parameter"""
+        return (search_type, n_results,
+                json.dumps(metadata_filters, sort_keys=True, default=str),
+                json.dumps(search_kwargs, sort_keys=True, default=str))
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: List[float], key: Hashable) -> Optional[List[Any]]:
+        """
+        Look up results cached for a near-identical query
+
+        Args:
+            embedding: Query embedding
+            key: Exact-match key from make_key()
+
+        Returns:
+            Copy of the cached results, or None on a miss
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            candidates = [(entry_id, vector) for entry_id, (entry_key, vector, _) in self._entries.items()
+                          if entry_key == key]
+            if candidates:
+                # Cosine distance to every candidate in one kernel call over a contiguous float32 matrix
+                matrix = np.stack([vector for _, vector in candidates])
+                if SIMSIMD_AVAILABLE:
+                    distances = np.asarray(simsimd.cdist(query[None, :], matrix, metric="cosine"))[0]
+                else:
+                    distances = 1.0 - matrix @ query
+                best = int(np.argmin(distances))
+                if distances[best] < self.max_distance:
+                    entry_id = candidates[best][0]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    # A copy, so callers mutating their results cannot corrupt the cache
+                    return list(self._entries[entry_id][2])
+            self.misses += 1
+            return None
+
+    def put(self, embedding: List[float], key: Hashable, results: List[Any]) -> None:
+        """
+        Cache results for a query
+
+        Args:
+            embedding: Query embedding
+            key: Exact-match key from make_key()
+            results: Search results to cache (a copy is stored)
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._entries[self._next_id] = (key, vector, list(results))
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses
+        }
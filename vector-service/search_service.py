@@ -3,10 +3,14 @@ Search Service for FinSightAI
 Combines semantic search with metadata filtering for intelligent document retrieval
 """
 import os
+import re
+import math
 import logging
+from collections import Counter
 from typing import List, Dict, Any, Optional, Union, Tuple
 from datetime import datetime
 import json
+import numpy as np
 
 # Import our services
 try:
@@ -64,6 +68,182 @@ class SearchResult:
         return f"SearchResult(id={self.document.document_id}, score={self.score:.4f}, type={self.search_type})"
 
 
+def to_chroma_where(metadata_filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate flat metadata filters into a ChromaDB where clause
+    
+    ChromaDB only accepts a single field per where dict, so multi-field
+    filters are combined with $and and evaluated inside the index query.
+    
+    Args:
+        metadata_filters: Field -> value (or operator dict) filters
+    
+    Returns:
+        ChromaDB where clause, or None when there is nothing to filter on
+    """
+    if not metadata_filters:
+        return None
+    if len(metadata_filters) == 1 or any(key.startswith('$') for key in metadata_filters):
+        return metadata_filters
+    return {'$and': [{key: value} for key, value in metadata_filters.items()]}
+
+
+def results_to_columns(results: List[SearchResult]) -> Tuple[List[str], List[str], List[Dict[str, Any]], List[float]]:
+    """
+    Transpose search results into parallel columns
+    
+    Args:
+        results: Search results
+    
+    Returns:
+        Tuple of (document IDs, texts, metadatas, scores)
+    """
+    documents = [result.document for result in results]
+    return (
+        [doc.document_id for doc in documents],
+        [doc.text for doc in documents],
+        [doc.metadata for doc in documents],
+        [result.score for result in results]
+    )
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via an O(N) partial selection"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def mmr_select(query_embedding: List[float],
+               candidate_embeddings: List[List[float]],
+               k: int,
+               lambda_mult: float = 0.5) -> List[int]:
+    """
+    Pick k diverse candidates by Maximal Marginal Relevance
+    
+    Query and pairwise candidate similarities are computed once as matrices;
+    each selection step is then a vectorized update and argmax.
+    
+    Args:
+        query_embedding: Query embedding
+        candidate_embeddings: Candidate embeddings, one per row
+        k: Number of candidates to select
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+    
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    emb = np.asarray(candidate_embeddings, dtype=np.float32)
+    if emb.ndim != 2 or len(emb) == 0:
+        return []
+    
+    # Cosine similarity is scale-invariant, so int8 codes work as well as floats
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    emb = emb / np.where(norms == 0, 1.0, norms)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    query = query / query_norm if query_norm else query
+    
+    sim_q = emb @ query
+    sim_cc = emb @ emb.T
+    
+    selected: List[int] = []
+    redundancy = np.zeros(len(emb), dtype=np.float32)
+    available = np.ones(len(emb), dtype=bool)
+    for _ in range(min(k, len(emb))):
+        scores = np.where(available, lambda_mult * sim_q - (1.0 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        redundancy = sim_cc[:, best] if not selected else np.maximum(redundancy, sim_cc[:, best])
+        selected.append(best)
+        available[best] = False
+    return selected
+
+
+class BM25Index:
+    """
+    Okapi BM25 term-frequency index over a fixed set of documents
+    """
+    
+    def __init__(self, 
+                 doc_ids: List[str],
+                 tokenized_docs: List[List[str]],
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        """
+        Build the index
+        
+        Args:
+            doc_ids: Document IDs, parallel to tokenized_docs
+            tokenized_docs: Token lists for each document
+            k1: Term frequency saturation parameter
+            b: Document length normalization parameter
+        """
+        self.doc_ids = list(doc_ids)
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [Counter(tokens) for tokens in tokenized_docs]
+        self.doc_lengths = np.array([len(tokens) for tokens in tokenized_docs], dtype=np.float32)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+        
+        # Inverse document frequency per term
+        document_frequency = Counter()
+        for freqs in self.doc_freqs:
+            document_frequency.update(freqs.keys())
+        n_docs = len(self.doc_ids)
+        self.idf = {
+            term: math.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+            for term, df in document_frequency.items()
+        }
+    
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """Score every indexed document against the query tokens"""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        if not self.doc_ids or not self.avg_doc_length:
+            return scores
+        
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / self.avg_doc_length)
+        for term in set(query_tokens):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            tf = np.array([freqs.get(term, 0) for freqs in self.doc_freqs], dtype=np.float32)
+            scores += idf * tf * (self.k1 + 1) / (tf + length_norm)
+        return scores
+    
+    def rank(self, 
+             query_tokens: List[str],
+             n_results: int,
+             allowed_ids: Optional[set] = None) -> List[Tuple[str, float]]:
+        """
+        Return the top matching (document_id, score) pairs, best first
+        
+        Args:
+            query_tokens: Tokenized query
+            n_results: Number of results to return
+            allowed_ids: Optional set of document IDs to restrict ranking to
+        """
+        scores = self.get_scores(query_tokens)
+        if allowed_ids is not None:
+            mask = np.fromiter((doc_id in allowed_ids for doc_id in self.doc_ids),
+                               dtype=bool, count=len(self.doc_ids))
+            scores = np.where(mask, scores, 0.0)
+        
+        top = _top_k_indices(scores, n_results)
+        return [(self.doc_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+
+# Word extractor shared by BM25 indexing and querying
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens for BM25"""
+    return _WORD_RE.findall(text.lower())
+
+
 class SearchService:
     """
     Service for intelligent document search combining semantic and metadata approaches
@@ -85,13 +265,18 @@ class SearchService:
         self.chroma_service = chroma_service
         self.document_service = document_service
         
+        # BM25 index over document_service, built once and reused across queries
+        self._bm25_index: Optional[BM25Index] = None
+        self._bm25_version = -1
+        
         logger.info("Search service initialized")
     
     def semantic_search(self, 
                        query: str,
                        n_results: int = 10,
                        metadata_filters: Optional[Dict[str, Any]] = None,
-                       similarity_threshold: float = 0.5) -> List[SearchResult]:
+                       similarity_threshold: float = 0.5,
+                       query_embedding: Optional[List[float]] = None) -> List[SearchResult]:
         """
         Perform semantic search using vector similarity
         
@@ -100,48 +285,30 @@ class SearchService:
             n_results: Number of results to return
             metadata_filters: Metadata filters to apply
             similarity_threshold: Minimum similarity score (0-1)
+            query_embedding: Pre-computed embedding for the query
         
         Returns:
             List of search results ordered by similarity score
         """
         try:
             # Generate query embedding
-            query_embedding = self.embedding_service.encode(query)
+            if query_embedding is None:
+                query_embedding = self.embedding_service.encode(query, as_numpy=True)
             
             # Search in ChromaDB
             search_results = self.chroma_service.search_by_embedding(
                 query_embedding=query_embedding,
                 n_results=n_results * 2,  # Get more results for filtering
-                where=metadata_filters
+                where=to_chroma_where(metadata_filters)
             )
             
-            # Process results
-            results = []
-            for i in range(len(search_results['ids'][0])):
-                doc_id = search_results['ids'][0][i]
-                distance = search_results['distances'][0][i]
-                
-                # Convert distance to similarity score (assuming cosine distance)
-                similarity_score = 1 - distance
-                
-                # Apply similarity threshold
-                if similarity_score < similarity_threshold:
-                    continue
-                
-                # Get document from document service
-                doc = self.document_service.get_document(doc_id)
-                if doc:
-                    result = SearchResult(
-                        document=doc,
-                        score=similarity_score,
-                        search_type="semantic",
-                        query=query
-                    )
-                    results.append(result)
-            
-            # Sort by score (highest first) and limit results
-            results.sort(key=lambda x: x.score, reverse=True)
-            results = results[:n_results]
+            results = self._build_semantic_results(
+                query=query,
+                ids=search_results['ids'][0],
+                distances=search_results['distances'][0],
+                n_results=n_results,
+                similarity_threshold=similarity_threshold
+            )
             
             logger.info(f"Semantic search returned {len(results)} results for query: '{query}'")
             return results
@@ -150,12 +317,95 @@ class SearchService:
             logger.error(f"Error in semantic search: {e}")
             return []
     
+    def semantic_search_batch(self, 
+                             queries: List[str],
+                             n_results: int = 10,
+                             metadata_filters: Optional[Dict[str, Any]] = None,
+                             similarity_threshold: float = 0.5,
+                             query_embeddings: Optional[List[List[float]]] = None) -> List[List[SearchResult]]:
+        """
+        Perform semantic search for several queries with one embedding call and one query
+        
+        Args:
+            queries: Search query texts
+            n_results: Number of results to return per query
+            metadata_filters: Metadata filters applied to every query
+            similarity_threshold: Minimum similarity score (0-1)
+            query_embeddings: Pre-computed embeddings, parallel to queries
+        
+        Returns:
+            One list of search results per query, in query order
+        """
+        if not queries:
+            return []
+        
+        try:
+            # Generate all query embeddings in one call
+            if query_embeddings is None:
+                query_embeddings = self.embedding_service.encode(list(queries), as_numpy=True)
+            
+            # Search in ChromaDB with every query at once
+            search_results = self.chroma_service.search_by_embeddings(
+                query_embeddings=query_embeddings,
+                n_results=n_results * 2,  # Get more results for filtering
+                where=to_chroma_where(metadata_filters)
+            )
+            
+            batch_results = [
+                self._build_semantic_results(
+                    query=query,
+                    ids=ids,
+                    distances=distances,
+                    n_results=n_results,
+                    similarity_threshold=similarity_threshold
+                )
+                for query, ids, distances in zip(
+                    queries, search_results['ids'], search_results['distances']
+                )
+            ]
+            
+            logger.info(f"Batched semantic search ran {len(queries)} queries")
+            return batch_results
+            
+        except Exception as e:
+            logger.error(f"Error in batched semantic search: {e}")
+            return [[] for _ in queries]
+    
+    def _build_semantic_results(self, 
+                               query: str,
+                               ids: List[str],
+                               distances: List[float],
+                               n_results: int,
+                               similarity_threshold: float) -> List[SearchResult]:
+        """Convert one query's ChromaDB ids/distances into ranked search results"""
+        results = []
+        for doc_id, distance in zip(ids, distances):
+            # Convert distance to similarity score (assuming cosine distance)
+            similarity_score = 1 - distance
+            
+            # Apply similarity threshold
+            if similarity_score < similarity_threshold:
+                continue
+            
+            # Get document from document service
+            doc = self.document_service.get_document(doc_id)
+            if doc:
+                results.append(SearchResult(
+                    document=doc,
+                    score=similarity_score,
+                    search_type="semantic",
+                    query=query
+                ))
+        
+        # ChromaDB returns nearest neighbours first, so results are already ranked
+        return results[:n_results]
+    
     def text_search(self, 
                    query: str,
                    n_results: int = 10,
                    metadata_filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
         """
-        Perform text-based search using keyword matching
+        Perform text-based search using BM25 keyword scoring
         
         Args:
             query: Search query text
@@ -166,47 +416,16 @@ class SearchService:
             List of search results ordered by relevance
         """
         try:
-            # Use document service for text search
-            documents = self.document_service.search_documents(
-                query=query,
-                metadata_filters=metadata_filters,
-                limit=n_results * 2
-            )
-            
-            # Score documents based on query relevance
             scored_results = []
-            query_terms = query.lower().split()
-            
-            for doc in documents:
-                text_lower = doc.text.lower()
-                
-                # Calculate relevance score
-                score = 0
-                for term in query_terms:
-                    if term in text_lower:
-                        # Count occurrences and position
-                        occurrences = text_lower.count(term)
-                        first_pos = text_lower.find(term)
-                        
-                        # Score based on frequency and position
-                        score += occurrences * 0.1
-                        if first_pos < len(text_lower) * 0.3:  # Bonus for early appearance
-                            score += 0.2
-                
-                # Normalize score
-                if score > 0:
-                    score = min(score, 1.0)  # Cap at 1.0
-                    result = SearchResult(
+            for doc_id, score in self._bm25_rank(query, n_results, metadata_filters):
+                doc = self.document_service.get_document(doc_id)
+                if doc:
+                    scored_results.append(SearchResult(
                         document=doc,
                         score=score,
                         search_type="text",
                         query=query
-                    )
-                    scored_results.append(result)
-            
-            # Sort by score and limit results
-            scored_results.sort(key=lambda x: x.score, reverse=True)
-            scored_results = scored_results[:n_results]
+                    ))
             
             logger.info(f"Text search returned {len(scored_results)} results for query: '{query}'")
             return scored_results
@@ -220,77 +439,74 @@ class SearchService:
                      n_results: int = 10,
                      metadata_filters: Optional[Dict[str, Any]] = None,
                      semantic_weight: float = 0.7,
-                     text_weight: float = 0.3) -> List[SearchResult]:
+                     text_weight: float = 0.3,
+                     query_embedding: Optional[List[float]] = None,
+                     rrf_k: int = 60,
+                     mmr_lambda: Optional[float] = None) -> List[SearchResult]:
         """
-        Perform hybrid search combining semantic and text approaches
+        Perform hybrid search fusing semantic and BM25 rankings
+        
+        The two ranked lists are merged with Reciprocal Rank Fusion,
+        score = sum(weight / (rrf_k + rank)), so raw score scales never mix.
         
         Args:
             query: Search query text
             n_results: Number of results to return
             metadata_filters: Metadata filters to apply
-            semantic_weight: Weight for semantic search results (0-1)
-            text_weight: Weight for text search results (0-1)
+            semantic_weight: Weight for the semantic ranking's RRF term
+            text_weight: Weight for the BM25 ranking's RRF term
+            query_embedding: Pre-computed embedding for the query
+            rrf_k: RRF rank offset; 60 is the standard choice
+            mmr_lambda: If set, diversify the top fused candidates with MMR
+                (1.0 = pure relevance, 0.0 = pure diversity)
         
         Returns:
-            List of search results with combined scoring
+            List of search results ordered by fused score, or MMR selection order
         """
         try:
-            # Perform both searches
-            semantic_results = self.semantic_search(
-                query=query,
-                n_results=n_results * 2,
-                metadata_filters=metadata_filters
-            )
+            candidate_count = max(n_results * 5, 50)
+            
+            if mmr_lambda is not None and query_embedding is None:
+                query_embedding = self.embedding_service.encode(query, as_numpy=True)
             
-            text_results = self.text_search(
+            # Dense ranking
+            semantic_results = self.semantic_search(
                 query=query,
-                n_results=n_results * 2,
-                metadata_filters=metadata_filters
+                n_results=candidate_count,
+                metadata_filters=metadata_filters,
+                query_embedding=query_embedding
             )
+            dense_ranking = [result.document.document_id for result in semantic_results]
+            
+            # Sparse ranking
+            sparse_ranking = [
+                doc_id for doc_id, _ in self._bm25_rank(query, candidate_count, metadata_filters)
+            ]
+            
+            # Reciprocal Rank Fusion
+            fused_scores: Dict[str, float] = {}
+            for ranking, weight in ((dense_ranking, semantic_weight), (sparse_ranking, text_weight)):
+                for rank, doc_id in enumerate(ranking, 1):
+                    fused_scores[doc_id] = fused_scores.get(doc_id, 0.0) + weight / (rrf_k + rank)
+            
+            fused_ids = list(fused_scores)
+            fused = np.fromiter(fused_scores.values(), dtype=np.float64, count=len(fused_ids))
+            if mmr_lambda is None:
+                top_ids = [fused_ids[i] for i in _top_k_indices(fused, n_results)]
+            else:
+                pool_ids = [fused_ids[i] for i in _top_k_indices(fused, n_results * 4)]
+                top_ids = self._mmr_rerank(query_embedding, pool_ids, n_results, mmr_lambda)
             
-            # Combine results
-            combined_results = {}
-            
-            # Process semantic results
-            for result in semantic_results:
-                doc_id = result.document.document_id
-                combined_results[doc_id] = {
-                    'document': result.document,
-                    'semantic_score': result.score,
-                    'text_score': 0.0,
-                    'combined_score': result.score * semantic_weight
-                }
-            
-            # Process text results
-            for result in text_results:
-                doc_id = result.document.document_id
-                if doc_id in combined_results:
-                    # Document exists in both results
-                    combined_results[doc_id]['text_score'] = result.score
-                    combined_results[doc_id]['combined_score'] += result.score * text_weight
-                else:
-                    # Document only in text results
-                    combined_results[doc_id] = {
-                        'document': result.document,
-                        'semantic_score': 0.0,
-                        'text_score': result.score,
-                        'combined_score': result.score * text_weight
-                    }
-            
-            # Convert to SearchResult objects
             final_results = []
-            for doc_id, data in combined_results.items():
-                result = SearchResult(
-                    document=data['document'],
-                    score=data['combined_score'],
-                    search_type="hybrid",
-                    query=query
-                )
-                final_results.append(result)
-            
-            # Sort by combined score and limit results
-            final_results.sort(key=lambda x: x.score, reverse=True)
-            final_results = final_results[:n_results]
+            for doc_id in top_ids:
+                doc = self.document_service.get_document(doc_id)
+                if doc:
+                    final_results.append(SearchResult(
+                        document=doc,
+                        score=fused_scores[doc_id],
+                        search_type="hybrid",
+                        query=query
+                    ))
             
             logger.info(f"Hybrid search returned {len(final_results)} results for query: '{query}'")
             return final_results
@@ -299,6 +515,65 @@ class SearchService:
             logger.error(f"Error in hybrid search: {e}")
             return []
     
+    def _mmr_rerank(self, 
+                    query_embedding: List[float],
+                    doc_ids: List[str],
+                    n_results: int,
+                    lambda_mult: float) -> List[str]:
+        """Reorder ranked candidates by MMR, keeping rank order if any lacks an embedding"""
+        embeddings = []
+        for doc_id in doc_ids:
+            doc = self.document_service.get_document(doc_id)
+            if not doc or doc.embedding is None:
+                return doc_ids[:n_results]
+            embeddings.append(doc.embedding)
+        
+        return [doc_ids[i] for i in mmr_select(query_embedding, embeddings, n_results, lambda_mult)]
+    
+    def build_bm25_index(self) -> int:
+        """
+        Tokenize every stored document once and cache the BM25 index
+        
+        Returns:
+            Number of documents indexed
+        """
+        documents = list(self.document_service.documents.values())
+        self._bm25_version = self.document_service.version
+        self._bm25_index = BM25Index(
+            doc_ids=[doc.document_id for doc in documents],
+            tokenized_docs=[_tokenize(doc.text) for doc in documents]
+        )
+        logger.info(f"Built BM25 index over {len(documents)} documents")
+        return len(documents)
+    
+    def invalidate_bm25_index(self) -> None:
+        """Drop the cached BM25 index so the next text search rebuilds it"""
+        self._bm25_index = None
+    
+    def _get_bm25_index(self) -> BM25Index:
+        """Return the cached BM25 index, rebuilding it if documents changed"""
+        index = self._bm25_index
+        if index is None or self._bm25_version != self.document_service.version:
+            self.build_bm25_index()
+            index = self._bm25_index
+        return index
+    
+    def _bm25_rank(self, 
+                   query: str,
+                   n_results: int,
+                   metadata_filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Rank documents matching the metadata filters by BM25 score"""
+        allowed_ids = None
+        if metadata_filters:
+            allowed_ids = {
+                doc.document_id
+                for doc in self.document_service.search_documents(metadata_filters=metadata_filters)
+            }
+            if not allowed_ids:
+                return []
+        
+        return self._get_bm25_index().rank(_tokenize(query), n_results, allowed_ids)
+    
     def search_by_category(self, 
                           category: str,
                           query: str = None,
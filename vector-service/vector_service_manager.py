@@ -4,22 +4,31 @@ Main interface that orchestrates all vector services
 """
 import os
 import logging
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Tuple
 from pathlib import Path
 import json
 from datetime import datetime
+import numpy as np
 
 # Import our services
 try:
-    from .embedding_service import EmbeddingService, create_embedding_service
-    from .chroma_service import ChromaService, create_chroma_service
+    from .embedding_service import (
+        EmbeddingService, create_embedding_service, quantize_embeddings, dequantize_embeddings
+    )
+    from .chroma_service import ChromaService, JinaEmbeddingFunction, create_chroma_service
     from .document_service import DocumentService, create_document_service
-    from .search_service import SearchService, create_search_service
+    from .search_service import SearchService, create_search_service, results_to_columns
+    from .query_cache import SemanticQueryCache
+    from .faiss_service import FaissService, create_faiss_service
 except ImportError:
-    from embedding_service import EmbeddingService, create_embedding_service
-    from chroma_service import ChromaService, create_chroma_service
+    from embedding_service import (
+        EmbeddingService, create_embedding_service, quantize_embeddings, dequantize_embeddings
+    )
+    from chroma_service import ChromaService, JinaEmbeddingFunction, create_chroma_service
     from document_service import DocumentService, create_document_service
-    from search_service import SearchService, create_search_service
+    from search_service import SearchService, create_search_service, results_to_columns
+    from query_cache import SemanticQueryCache
+    from faiss_service import FaissService, create_faiss_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,26 +42,49 @@ class VectorServiceManager:
     
     def __init__(self,
                  config: Optional[Dict[str, Any]] = None,
-                 base_dir: str = "./vector_services"):
+                 base_dir: str = "./vector_services",
+                 hnsw_params: Optional[Dict[str, Any]] = None,
+                 embedding_service: Optional[EmbeddingService] = None):
         """
         Initialize the vector service manager
         
         Args:
             config: Configuration dictionary
             base_dir: Base directory for all services
+            hnsw_params: HNSW index parameters for a newly created collection (overrides config)
+            embedding_service: Pre-built embedding service to use instead of creating a Jina one
         """
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
         
         # Load configuration
         self.config = config or self._load_default_config()
+        if hnsw_params is not None:
+            self.config.setdefault('chroma', {})['hnsw'] = hnsw_params
         
         # Initialize services
-        self.embedding_service = None
+        self.embedding_service = embedding_service
         self.chroma_service = None
         self.document_service = None
         self.search_service = None
         
+        # Opt-in cache of search results for near-identical queries
+        self.query_cache = None
+        cache_config = self.config.get('search', {}).get('query_cache', {})
+        if cache_config.get('enabled') or os.getenv('FINSIGHT_QCACHE') == '1':
+            self.enable_query_cache(
+                max_entries=cache_config.get('max_entries', 128),
+                similarity_threshold=cache_config.get('similarity_threshold', 0.97)
+            )
+        
+        # Stored embeddings as one contiguous float32 matrix (row i is _embedding_ids[i]),
+        # materialized on demand and dropped whenever documents change
+        self._embedding_ids: List[str] = []
+        self._embedding_matrix: Optional[np.ndarray] = None
+        
+        # FAISS index for the 'faiss_ivfpq' search backend, built on first use
+        self._faiss_service: Optional[FaissService] = None
+        
         # Initialize all services
         self._initialize_services()
         
@@ -71,33 +103,43 @@ class VectorServiceManager:
                 'collection_name': 'finsight_documents'
             },
             'document': {
-                'storage_dir': str(self.base_dir / 'documents')
+                'storage_dir': str(self.base_dir / 'documents'),
+                'quantize_embeddings': False
             },
             'search': {
                 'default_search_type': 'hybrid',
                 'semantic_weight': 0.7,
-                'text_weight': 0.3
+                'text_weight': 0.3,
+                'backend': 'chroma',
+                'query_cache': {
+                    'enabled': False,
+                    'max_entries': 128,
+                    'similarity_threshold': 0.97
+                }
             }
         }
     
     def _initialize_services(self) -> None:
         """Initialize all vector services"""
         try:
-            # Initialize embedding service
-            embedding_config = self.config['embedding']
-            self.embedding_service = create_embedding_service(
-                model_name=embedding_config['model_name'],
-                model_type=embedding_config['model_type'],
-                jina_api_key=embedding_config.get('jina_api_key'),
-                cache_dir=embedding_config['cache_dir']
-            )
+            # Initialize embedding service, unless one was injected
+            if self.embedding_service is None:
+                embedding_config = self.config['embedding']
+                self.embedding_service = create_embedding_service(
+                    model_name=embedding_config['model_name'],
+                    model_type=embedding_config['model_type'],
+                    jina_api_key=embedding_config.get('jina_api_key'),
+                    cache_dir=embedding_config['cache_dir']
+                )
             logger.info("Embedding service initialized")
             
             # Initialize ChromaDB service
             chroma_config = self.config['chroma']
             self.chroma_service = create_chroma_service(
                 persist_directory=chroma_config['persist_directory'],
-                collection_name=chroma_config['collection_name']
+                collection_name=chroma_config['collection_name'],
+                embedding_function=JinaEmbeddingFunction(self.embedding_service),
+                hnsw_params=chroma_config.get('hnsw')
             )
             logger.info("ChromaDB service initialized")
             
@@ -123,7 +165,8 @@ class VectorServiceManager:
     def add_documents(self, 
                      documents: List[Dict[str, Any]],
                      generate_embeddings: bool = True,
-                     add_to_vector_db: bool = True) -> List[str]:
+                     add_to_vector_db: bool = True,
+                     quantize: Optional[bool] = None) -> List[str]:
         """
         Add documents to the system
         
@@ -131,37 +174,57 @@ class VectorServiceManager:
             documents: List of document dictionaries
             generate_embeddings: Whether to generate embeddings
             add_to_vector_db: Whether to add to vector database
+            quantize: Keep the document store's embedding copy as int8 codes
+                with an 'emb_scale' metadata entry (4x smaller on disk); defaults
+                to the document.quantize_embeddings setting
         
         Returns:
             List of document IDs
         """
+        if quantize is None:
+            quantize = self.config.get('document', {}).get('quantize_embeddings', False)
+        
         try:
             added_ids = []
+            new_docs = []
+            seen_ids = set()
             
-            for doc_data in documents:
-                # Add to document service
-                doc = self.document_service.add_document(
-                    text=doc_data['text'],
-                    document_id=doc_data.get('id'),
-                    metadata=doc_data.get('metadata', {})
-                )
+            # Add to document service with a single registry write
+            for doc in self.document_service.add_documents(documents):
                 added_ids.append(doc.document_id)
                 
-                # Generate embedding if requested
-                if generate_embeddings:
-                    embedding = self.embedding_service.encode(doc.text)
+                # Duplicate content resolves to the same document; embed it once
+                if doc.document_id not in seen_ids:
+                    seen_ids.add(doc.document_id)
+                    new_docs.append(doc)
+            
+            # Generate all embeddings in a single batched call if requested
+            if generate_embeddings and new_docs:
+                embeddings = self.embedding_service.encode([doc.text for doc in new_docs], as_numpy=True)
+                
+                if quantize:
+                    codes, scales = quantize_embeddings(embeddings)
+                    stored = [(row.tolist(), {'embedding_generated': True, 'emb_scale': float(scale)})
+                              for row, scale in zip(codes, scales)]
+                else:
+                    stored = [(embedding, {'embedding_generated': True}) for embedding in embeddings.tolist()]
+                
+                # Attach embeddings in memory, then persist the batch with one registry write
+                metadata_updates = {}
+                for doc, (embedding, metadata) in zip(new_docs, stored):
                     doc.embedding = embedding
-                    
-                    # Update document with embedding
-                    self.document_service.update_document(
-                        doc.document_id,
-                        metadata={'embedding_generated': True}
-                    )
+                    metadata_updates[doc.document_id] = metadata
+                self.document_service.update_documents(metadata_updates)
                 
-                # Add to vector database if requested
-                if add_to_vector_db and generate_embeddings:
-                    chroma_doc = doc.to_chroma_format()
-                    self.chroma_service.add_documents([chroma_doc])
+                # Add to vector database in one batch if requested
+                if add_to_vector_db:
+                    self.chroma_service.add_documents(
+                        [doc.to_chroma_format() for doc in new_docs],
+                        embeddings=embeddings
+                    )
+            
+            # New documents change BM25 statistics and cached results
+            self._invalidate_search_caches()
             
             logger.info(f"Added {len(added_ids)} documents to the system")
             return added_ids
@@ -170,6 +233,39 @@ class VectorServiceManager:
             logger.error(f"Error adding documents: {e}")
             raise
     
+    def build_bm25_index(self) -> int:
+        """
+        Precompute the BM25 index used by text and hybrid search
+        
+        Returns:
+            Number of documents indexed
+        """
+        return self.search_service.build_bm25_index()
+    
+    def enable_query_cache(self, max_entries: int = 128, similarity_threshold: float = 0.97) -> None:
+        """
+        Serve semantic and hybrid searches from cache when a query embedding is
+        within the given cosine similarity of an earlier query, skipping ChromaDB
+        
+        Args:
+            max_entries: Maximum number of cached queries before LRU eviction
+            similarity_threshold: Minimum cosine similarity for a cache hit
+        """
+        self.query_cache = SemanticQueryCache(
+            max_entries=max_entries,
+            max_distance=1.0 - similarity_threshold
+        )
+        logger.info(f"Query cache enabled (max {max_entries} entries, similarity >= {similarity_threshold})")
+    
+    def warmup(self) -> bool:
+        """
+        Warm the vector index so the first search does not pay for loading it
+        
+        Returns:
+            True if the index was warmed
+        """
+        return self.chroma_service.warmup()
+    
     def search(self, 
                query: str,
                search_type: str = "hybrid",
@@ -190,32 +286,209 @@ class VectorServiceManager:
             List of search results
         """
         try:
-            if search_type == "semantic":
-                return self.search_service.semantic_search(
-                    query=query,
-                    n_results=n_results,
-                    metadata_filters=metadata_filters,
-                    **kwargs
-                )
-            elif search_type == "text":
-                return self.search_service.text_search(
-                    query=query,
-                    n_results=n_results,
-                    metadata_filters=metadata_filters,
-                    **kwargs
-                )
-            else:  # hybrid
-                return self.search_service.hybrid_search(
-                    query=query,
-                    n_results=n_results,
-                    metadata_filters=metadata_filters,
-                    **kwargs
-                )
+            if self.query_cache is not None and search_type != "text":
+                return self._cached_search(query, search_type, n_results, metadata_filters, **kwargs)
+            return self._run_search(query, search_type, n_results, metadata_filters, **kwargs)
                 
         except Exception as e:
             logger.error(f"Error in search: {e}")
             return []
     
+    def search_columns(self, 
+                       query: str,
+                       search_type: str = "hybrid",
+                       n_results: int = 10,
+                       metadata_filters: Optional[Dict[str, Any]] = None,
+                       **kwargs) -> Tuple[List[str], List[str], List[Dict[str, Any]], List[float]]:
+        """
+        Search for documents and return parallel result columns
+        
+        Args:
+            query: Search query
+            search_type: Type of search ('semantic', 'text', 'hybrid')
+            n_results: Number of results to return
+            metadata_filters: Metadata filters to apply
+            **kwargs: Additional search parameters
+        
+        Returns:
+            Tuple of (document IDs, texts, metadatas, scores)
+        """
+        return results_to_columns(
+            self.search(query, search_type, n_results, metadata_filters, **kwargs)
+        )
+    
+    def _run_search(self, 
+                    query: str,
+                    search_type: str,
+                    n_results: int,
+                    metadata_filters: Optional[Dict[str, Any]],
+                    **kwargs) -> List[Any]:
+        """Dispatch a search to the search service by type"""
+        if self._uses_faiss(search_type, metadata_filters):
+            return self._faiss_semantic_search(query, n_results, **kwargs)
+        
+        if search_type == "semantic":
+            return self.search_service.semantic_search(
+                query=query,
+                n_results=n_results,
+                metadata_filters=metadata_filters,
+                **kwargs
+            )
+        elif search_type == "text":
+            return self.search_service.text_search(
+                query=query,
+                n_results=n_results,
+                metadata_filters=metadata_filters,
+                **kwargs
+            )
+        else:  # hybrid
+            return self.search_service.hybrid_search(
+                query=query,
+                n_results=n_results,
+                metadata_filters=metadata_filters,
+                **kwargs
+            )
+    
+    def _cached_search(self, 
+                       query: str,
+                       search_type: str,
+                       n_results: int,
+                       metadata_filters: Optional[Dict[str, Any]],
+                       **kwargs) -> List[Any]:
+        """Serve a search from the semantic query cache, filling it on a miss"""
+        query_embedding = kwargs.pop('query_embedding', None)
+        if query_embedding is None:
+            query_embedding = self.embedding_service.encode(query, as_numpy=True)
+        
+        key = SemanticQueryCache.make_key(search_type, n_results, metadata_filters, **kwargs)
+        cached = self.query_cache.get(query_embedding, key)
+        if cached is not None:
+            logger.debug(f"Query cache hit for: '{query}'")
+            return cached
+        
+        results = self._run_search(query, search_type, n_results, metadata_filters,
+                                   query_embedding=query_embedding, **kwargs)
+        if results:
+            self.query_cache.put(query_embedding, key, results)
+        return results
+    
+    def _uses_faiss(self, search_type: str, metadata_filters: Optional[Dict[str, Any]]) -> bool:
+        """FAISS serves unfiltered semantic searches when it is the configured backend"""
+        return (search_type == "semantic" and not metadata_filters
+                and self.config.get('search', {}).get('backend') == 'faiss_ivfpq')
+    
+    def _faiss_semantic_search(self, 
+                               query: str,
+                               n_results: int,
+                               similarity_threshold: float = 0.5,
+                               query_embedding: Optional[List[float]] = None) -> List[Any]:
+        """Semantic search against the FAISS index instead of ChromaDB"""
+        if self._faiss_service is None:
+            ids, matrix = self.get_embedding_matrix()
+            faiss_config = self.config.get('search', {}).get('faiss', {})
+            self._faiss_service = create_faiss_service(**faiss_config)
+            self._faiss_service.build(ids, matrix)
+        
+        if query_embedding is None:
+            query_embedding = self.embedding_service.encode(query, as_numpy=True)
+        
+        batch_ids, batch_scores = self._faiss_service.search([query_embedding], n_results)
+        return self.search_service._build_semantic_results(
+            query=query,
+            ids=batch_ids[0],
+            distances=[1.0 - score for score in batch_scores[0]],
+            n_results=n_results,
+            similarity_threshold=similarity_threshold
+        )
+    
+    def _invalidate_search_caches(self) -> None:
+        """Drop cached search state after the document set changes"""
+        self.search_service.invalidate_bm25_index()
+        self._embedding_ids = []
+        self._embedding_matrix = None
+        self._faiss_service = None
+        if self.query_cache is not None:
+            self.query_cache.clear()
+    
+    def search_batch(self, 
+                     queries: List[str],
+                     search_type: str = "semantic",
+                     n_results: int = 10,
+                     metadata_filters: Optional[Dict[str, Any]] = None,
+                     query_embeddings: Optional[List[List[float]]] = None,
+                     **kwargs) -> List[List[Any]]:
+        """
+        Search for several queries sharing the same type and filters
+        
+        Semantic queries are embedded and searched in one round-trip; other
+        search types run per query, reusing any pre-computed embeddings.
+        
+        Args:
+            queries: Search queries
+            search_type: Type of search ('semantic', 'text', 'hybrid')
+            n_results: Number of results to return per query
+            metadata_filters: Metadata filters applied to every query
+            query_embeddings: Pre-computed embeddings, parallel to queries
+            **kwargs: Additional search parameters
+        
+        Returns:
+            One list of search results per query, in query order
+        """
+        # FAISS-backed semantic queries run per query below
+        if search_type == "semantic" and not self._uses_faiss(search_type, metadata_filters):
+            if self.query_cache is not None:
+                return self._cached_semantic_search_batch(
+                    queries, n_results, metadata_filters, query_embeddings, **kwargs
+                )
+            return self.search_service.semantic_search_batch(
+                queries=queries,
+                n_results=n_results,
+                metadata_filters=metadata_filters,
+                query_embeddings=query_embeddings,
+                **kwargs
+            )
+        
+        if search_type != "text" and query_embeddings is not None:
+            return [
+                self.search(query, search_type, n_results, metadata_filters,
+                            query_embedding=embedding, **kwargs)
+                for query, embedding in zip(queries, query_embeddings)
+            ]
+        
+        return [
+            self.search(query, search_type, n_results, metadata_filters, **kwargs)
+            for query in queries
+        ]
+    
+    def _cached_semantic_search_batch(self, 
+                                      queries: List[str],
+                                      n_results: int,
+                                      metadata_filters: Optional[Dict[str, Any]],
+                                      query_embeddings: Optional[List[List[float]]],
+                                      **kwargs) -> List[List[Any]]:
+        """Batched semantic search that only sends cache misses to ChromaDB"""
+        if query_embeddings is None:
+            query_embeddings = self.embedding_service.encode(list(queries), as_numpy=True)
+        
+        key = SemanticQueryCache.make_key("semantic", n_results, metadata_filters, **kwargs)
+        results = [self.query_cache.get(embedding, key) for embedding in query_embeddings]
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        
+        if misses:
+            fetched = self.search_service.semantic_search_batch(
+                queries=[queries[i] for i in misses],
+                n_results=n_results,
+                metadata_filters=metadata_filters,
+                query_embeddings=[query_embeddings[i] for i in misses],
+                **kwargs
+            )
+            for i, query_results in zip(misses, fetched):
+                results[i] = query_results
+                if query_results:
+                    self.query_cache.put(query_embeddings[i], key, query_results)
+        
+        return results
+    
     def search_by_category(self, 
                           category: str,
                           query: str = None,
@@ -246,6 +519,49 @@ class VectorServiceManager:
         """Get a document by ID"""
         return self.document_service.get_document(document_id)
     
+    def get_embedding_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Get all stored embeddings as one C-contiguous float32 matrix
+        
+        Returns:
+            Tuple of (document IDs, matrix) where row i belongs to ids[i]
+        """
+        if self._embedding_matrix is None:
+            ids = []
+            rows = []
+            for document_id in self.document_service.documents:
+                embedding = self.get_document_embedding(document_id)
+                if embedding is not None:
+                    ids.append(document_id)
+                    rows.append(embedding)
+            
+            if rows:
+                matrix = np.ascontiguousarray(rows, dtype=np.float32)
+            else:
+                matrix = np.empty((0, self.embedding_service.embedding_dim), dtype=np.float32)
+            self._embedding_ids, self._embedding_matrix = ids, matrix
+        
+        return self._embedding_ids, self._embedding_matrix
+    
+    def get_document_embedding(self, document_id: str) -> Optional[List[float]]:
+        """
+        Get a document's stored embedding, dequantizing int8 codes if needed
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            Float embedding or None if the document has none
+        """
+        doc = self.document_service.get_document(document_id)
+        if not doc or doc.embedding is None:
+            return None
+        
+        scale = doc.metadata.get('emb_scale')
+        if scale is None:
+            return doc.embedding
+        return dequantize_embeddings([doc.embedding], [scale])[0].tolist()
+    
     def update_document(self, 
                        document_id: str,
                        text: Optional[str] = None,
@@ -270,6 +586,8 @@ class VectorServiceManager:
                 text=text,
                 metadata=metadata
             )
+            if success:
+                self._invalidate_search_caches()
             
             if success and regenerate_embedding:
                 # Get updated document
@@ -299,6 +617,8 @@ class VectorServiceManager:
         try:
             # Delete from document service
             doc_success = self.document_service.delete_document(document_id)
+            if doc_success:
+                self._invalidate_search_caches()
             
             # Delete from vector database
             vector_success = self.chroma_service.delete_document(document_id)
@@ -323,6 +643,7 @@ class VectorServiceManager:
                     }
                 },
                 'search_capabilities': self.search_service.get_search_analytics() if self.search_service else {},
+                'query_cache': self.query_cache.get_stats() if self.query_cache else None,
                 'configuration': self.config
             }
             
@@ -432,18 +753,33 @@ class VectorServiceManager:
 
 # Factory function for easy manager creation
 def create_vector_service_manager(config: Optional[Dict[str, Any]] = None,
-                                base_dir: str = "./vector_services") -> VectorServiceManager:
+                                base_dir: str = "./vector_services",
+                                quantize_embeddings: Optional[bool] = None,
+                                hnsw: Optional[Dict[str, Any]] = None,
+                                backend: Optional[str] = None,
+                                embedding_service: Optional[EmbeddingService] = None) -> VectorServiceManager:
     """
     Factory function to create a vector service manager
     
     Args:
         config: Configuration dictionary
         base_dir: Base directory for all services
+        quantize_embeddings: Store document embeddings as int8 codes (overrides config)
+        hnsw: HNSW index parameters for a newly created collection, e.g.
+            {'M': 24, 'construction_ef': 128, 'search_ef': 100}
+        backend: Semantic search backend, 'chroma' or 'faiss_ivfpq' (overrides config)
+        embedding_service: Pre-built embedding service; defaults to a Jina service from config
     
     Returns:
         Configured VectorServiceManager instance
     """
-    return VectorServiceManager(config=config, base_dir=base_dir)
+    manager = VectorServiceManager(config=config, base_dir=base_dir, hnsw_params=hnsw,
+                                   embedding_service=embedding_service)
+    if quantize_embeddings is not None:
+        manager.config.setdefault('document', {})['quantize_embeddings'] = quantize_embeddings
+    if backend is not None:
+        manager.config.setdefault('search', {})['backend'] = backend
+    return manager
 
 
 # Pre-configured manager for common use cases